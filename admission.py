@@ -0,0 +1,229 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from config import CONFIG
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Queue priorities: lower is served first
+PRIORITY_CHAT = 0
+PRIORITY_OVERVIEW = 1
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised instead of calling the model when a request is not admitted. reason is
+    "session_rate", "global_rate", "queue_full", "overloaded" (the expected wait is
+    longer than allowed) or "deadline" (the request waited as long as allowed).
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class TokenBucket:
+    """Allows bursts of up to burst requests, refilled at rate_per_minute."""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available. Returns False when the bucket is empty."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def refund(self):
+        """Return a token taken for a request that was rejected for another reason."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class AdmissionController:
+    """
+    Admission control in front of model calls.
+
+    A request first needs a token from its session's bucket and from the global
+    bucket, then one of max_concurrency slots. When every slot is taken it waits in
+    a bounded priority queue, where lower priorities and sessions with fewer requests
+    already running or queued go first. A request is shed right away when the
+    queue is full or the expected wait (from the average time a slot is held) is
+    longer than max_wait, and when it has waited max_wait without getting a slot.
+    """
+
+    def __init__(self, max_concurrency=None, max_queue=None, max_wait=None, session_rpm=None, session_burst=None,
+                 global_rpm=None, global_burst=None, max_sessions=None):
+        self.max_concurrency = max_concurrency or CONFIG["admission_max_concurrency"]
+        self.max_queue = max_queue if max_queue is not None else CONFIG["admission_max_queue"]
+        self.max_wait = max_wait if max_wait is not None else CONFIG["admission_max_wait"]
+        self.session_rpm = session_rpm if session_rpm is not None else CONFIG["admission_session_rpm"]
+        self.session_burst = session_burst or CONFIG["admission_session_burst"]
+        self.max_sessions = max_sessions or CONFIG["admission_max_sessions"]
+        global_rpm = global_rpm if global_rpm is not None else CONFIG["admission_global_rpm"]
+        # A rate of 0 disables that limit
+        self._global_bucket = TokenBucket(global_rpm, global_burst or CONFIG["admission_global_burst"]) if global_rpm else None
+        self._session_buckets = OrderedDict()  # session id -> TokenBucket, least recently used first
+        self._buckets_lock = threading.Lock()
+
+        self._condition = threading.Condition()
+        self._queue = []  # heap of [priority, session requests ahead, sequence, session id]
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._active = defaultdict(int)  # session id -> requests running or queued
+        self._service_time = 0.0  # Moving average of how long a slot is held
+        self.outcomes = defaultdict(int)
+
+    def _session_bucket(self, session_id):
+        with self._buckets_lock:
+            bucket = self._session_buckets.get(session_id)
+            if bucket is None:
+                bucket = self._session_buckets[session_id] = TokenBucket(self.session_rpm, self.session_burst)
+                if len(self._session_buckets) > self.max_sessions:
+                    self._session_buckets.popitem(last=False)
+            else:
+                self._session_buckets.move_to_end(session_id)
+            return bucket
+
+    def _reject(self, reason, message):
+        with self._condition:
+            self.outcomes[reason] += 1
+        metrics.count("insurance_admission_total", outcome=reason)
+        logger.warning(f"Request not admitted ({reason}): {message}")
+        raise AdmissionRejected(reason, message)
+
+    def check_session(self, session_id):
+        """
+        Take a token from the session's bucket, or reject. Returns the bucket, so the token
+        can be refunded if the request is shed later, or None when the session is not limited.
+        """
+        session_bucket = self._session_bucket(session_id) if session_id and self.session_rpm else None
+        if session_bucket is not None and not session_bucket.try_acquire():
+            self._reject("session_rate", f"session {session_id} is over {self.session_rpm} requests per minute")
+        return session_bucket
+
+    def _check_rate(self, session_id, session_checked):
+        """Take a token from the session's bucket and the global one, or reject. Returns the buckets taken from."""
+        session_bucket = None if session_checked else self.check_session(session_id)
+        if self._global_bucket is not None and not self._global_bucket.try_acquire():
+            # The session's token is not spent on a request that never runs
+            if session_bucket is not None:
+                session_bucket.refund()
+            self._reject("global_rate", "over the global request rate")
+        return [bucket for bucket in (session_bucket, self._global_bucket) if bucket is not None]
+
+    def _acquire_slot(self, session_id, priority):
+        """Wait for a slot in priority order. Returns the seconds waited."""
+        with self._condition:
+            if self._in_flight < self.max_concurrency and not self._queue:
+                self._in_flight += 1
+                self._active[session_id] += 1
+                return 0.0
+
+            if len(self._queue) >= self.max_queue:
+                self._reject("queue_full", f"{len(self._queue)} requests already queued")
+            expected_wait = (len(self._queue) + 1) / self.max_concurrency * self._service_time
+            if expected_wait > self.max_wait:
+                self._reject("overloaded", f"expected wait {expected_wait:.1f}s is over {self.max_wait}s")
+
+            entry = [priority, self._active[session_id], next(self._sequence), session_id]
+            heapq.heappush(self._queue, entry)
+            self._active[session_id] += 1
+            started = time.monotonic()
+            deadline = started + self.max_wait
+            while self._queue[0] is not entry or self._in_flight >= self.max_concurrency:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._leave(session_id)
+                    self._condition.notify_all()
+                    self._reject("deadline", f"no slot within {self.max_wait}s")
+                self._condition.wait(remaining)
+
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            # Another slot may be free for the next request in line
+            self._condition.notify_all()
+            return time.monotonic() - started
+
+    def _leave(self, session_id):
+        self._active[session_id] -= 1
+        if not self._active[session_id]:
+            del self._active[session_id]
+
+    def _release(self, session_id, held):
+        with self._condition:
+            self._in_flight -= 1
+            self._leave(session_id)
+            self._service_time = held if not self._service_time else 0.8 * self._service_time + 0.2 * held
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self, session_id=None, priority=PRIORITY_CHAT, session_checked=False):
+        """
+        Hold a slot for one model call. Raises AdmissionRejected, without waiting
+        longer than max_wait, when the request is rate limited or shed. With
+        session_checked, the caller already took the session's token with
+        check_session (and refunds it if the request is shed).
+        """
+        buckets = self._check_rate(session_id, session_checked)
+        try:
+            with metrics.span("queue"):
+                waited = self._acquire_slot(session_id, priority)
+        except AdmissionRejected:
+            # A shed request does not use up the rate budget
+            for bucket in buckets:
+                bucket.refund()
+            raise
+        with self._condition:
+            self.outcomes["admitted"] += 1
+        metrics.count("insurance_admission_total", outcome="admitted")
+        metrics.observe("insurance_admission_wait_seconds", waited)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(session_id, time.monotonic() - started)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._queue),
+                "service_time": self._service_time,
+                "sessions_tracked": len(self._session_buckets),
+                "outcomes": dict(self.outcomes)
+            }
+
+
+# Process-wide controller shared by every InsuranceLLM instance
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_admission_controller():
+    """Return the process-wide admission controller, creating it on first use. None if disabled."""
+    global _controller
+    if not CONFIG["admission_enabled"]:
+        return None
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,189 @@
+"""
+Headless HTTP API for the insurance chatbot, built on the same core as the Streamlit app.
+
+Usage:
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+    python api.py --workers 4
+
+Requests are stateless: conversation history is read from and written to the
+conversation store on every request, so any worker can serve any session (use the
+sqlite store so workers share it). Set CHAT_SERVICE_URL=http://host:8000 to make the
+Streamlit app a client of this service.
+"""
+import argparse
+import json
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import Annotated, List, Optional, Union
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+import bootstrap
+from config import CONFIG
+from chat_service import ChatService
+import metrics
+
+bootstrap.init()
+logger = logging.getLogger(__name__)
+
+
+MessageText = Annotated[str, Field(min_length=1, max_length=CONFIG["api_max_message_chars"])]
+
+
+class ChatRequest(BaseModel):
+    message: MessageText
+    session_id: Optional[str] = None  # A new conversation is started when omitted
+    country: str = CONFIG["default_country"]
+    language: str = CONFIG["default_language"]
+    insurance_type: Optional[str] = None  # Detected from the message when omitted
+
+
+class InsuranceInfoRequest(BaseModel):
+    insurance_type: str
+    session_id: Optional[str] = None
+    country: str = CONFIG["default_country"]
+    language: str = CONFIG["default_language"]
+
+
+class ClassifyRecord(BaseModel):
+    message: MessageText
+    id: Optional[Union[str, int]] = None  # The position in messages when omitted
+    country: Optional[str] = None
+    language: Optional[str] = None
+
+    @field_validator("country")
+    @classmethod
+    def _supported_country(cls, country):
+        if country is not None and country not in CONFIG["countries"]:
+            raise ValueError(f"Unsupported country: {country}")
+        return country
+
+    @field_validator("language")
+    @classmethod
+    def _supported_language(cls, language):
+        if language is not None and language not in CONFIG["supported_languages"]:
+            raise ValueError(f"Unsupported language: {language}")
+        return language
+
+
+class ClassifyRequest(BaseModel):
+    messages: List[Union[MessageText, ClassifyRecord]] = Field(max_length=CONFIG["api_max_classify_messages"])
+    country: Optional[str] = None
+    language: Optional[str] = None
+
+
+def _check_options(country=None, language=None, insurance_type=None):
+    """Reject countries, languages and insurance types the chatbot doesn't support."""
+    if country is not None and country not in CONFIG["countries"]:
+        raise HTTPException(status_code=422, detail=f"Unsupported country: {country}")
+    if language is not None and language not in CONFIG["supported_languages"]:
+        raise HTTPException(status_code=422, detail=f"Unsupported language: {language}")
+    if insurance_type is not None and insurance_type not in CONFIG["insurance_types"]:
+        raise HTTPException(status_code=422, detail=f"Unknown insurance type: {insurance_type}")
+
+def _sse(data, event=None):
+    """Format one server-sent event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Each worker process builds and warms its own service before it accepts requests;
+    # loading the model client and indexes blocks
+    service = await run_in_threadpool(ChatService, refresh_history=True)
+    await run_in_threadpool(bootstrap.preflight, service)
+    app.state.service = service
+    yield
+
+app = FastAPI(title=CONFIG["app_title"], lifespan=lifespan)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Metrics of the worker that serves the request, in the Prometheus text format."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.post("/chat")
+async def chat(body: ChatRequest, request: Request):
+    """Answer a message and return the stored turn."""
+    _check_options(body.country, body.language, body.insurance_type)
+    session_id = body.session_id or uuid.uuid4().hex
+    turn = await run_in_threadpool(
+        request.app.state.service.chat,
+        session_id, body.message, body.country, body.language, body.insurance_type
+    )
+    return {"session_id": session_id, "insurance_type": turn.insurance_type, "turn": turn.to_dict()}
+
+@app.post("/chat/stream")
+async def chat_stream(body: ChatRequest, request: Request):
+    """
+    Answer a message as server-sent events: a "start" event with the session id and
+    insurance type, one data event per text chunk, then a "done" event with the stored turn.
+    """
+    _check_options(body.country, body.language, body.insurance_type)
+    session_id = body.session_id or uuid.uuid4().hex
+    stream = await run_in_threadpool(
+        request.app.state.service.chat_stream,
+        session_id, body.message, body.country, body.language, body.insurance_type
+    )
+
+    async def events():
+        yield _sse({"session_id": session_id, "insurance_type": stream.insurance_type}, "start")
+        # Generation blocks, so chunks are pulled in the thread pool
+        async for chunk in iterate_in_threadpool(iter(stream)):
+            yield _sse({"text": chunk})
+        yield _sse({"turn": stream.turn.to_dict()}, "done")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/insurance-info")
+async def insurance_info(body: InsuranceInfoRequest, request: Request):
+    """Add an overview of an insurance type to a conversation and return the stored turn."""
+    _check_options(body.country, body.language, body.insurance_type)
+    session_id = body.session_id or uuid.uuid4().hex
+    turn = await run_in_threadpool(
+        request.app.state.service.insurance_info,
+        session_id, body.insurance_type, body.country, body.language
+    )
+    return {"session_id": session_id, "insurance_type": turn.insurance_type, "turn": turn.to_dict()}
+
+@app.post("/classify")
+async def classify(body: ClassifyRequest, request: Request):
+    """Detect the insurance type of each message, without generating answers."""
+    _check_options(body.country, body.language)
+    messages = [m if isinstance(m, str) else m.model_dump(exclude_none=True) for m in body.messages]
+    results = await run_in_threadpool(request.app.state.service.classify, messages, body.language, body.country)
+    return {"results": results}
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str, request: Request):
+    """Return the stored turns of a conversation."""
+    turns = await run_in_threadpool(request.app.state.service.history, session_id)
+    return {"session_id": session_id, "turns": [turn.to_dict() for turn in turns]}
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str, request: Request):
+    """Delete a conversation."""
+    await run_in_threadpool(request.app.state.service.clear, session_id)
+    return {"session_id": session_id, "deleted": True}
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the insurance chatbot HTTP API.")
+    parser.add_argument("--host", default=CONFIG["api_host"])
+    parser.add_argument("--port", type=int, default=CONFIG["api_port"])
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    args = parser.parse_args()
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
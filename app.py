@@ -1,37 +1,100 @@
 import streamlit as st
 import logging
 import time
+import uuid
+import bootstrap
 from config import CONFIG
-from model import InsuranceLLM
 from ui_components import InsuranceChatbotUI
-from insurance_logic import InsuranceAssistant
+import metrics
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Environment and logging are set up once per process; on reruns this is a no-op
+bootstrap.init()
 logger = logging.getLogger(__name__)
 
+# Components are created once per process and shared by every session and rerun;
+# anything specific to a session lives in st.session_state. No spinner: the first
+# call happens before the header, and st.set_page_config() must come first.
+@st.cache_resource(show_spinner=False)
+def get_ui():
+    return InsuranceChatbotUI()
+
+@st.cache_resource(show_spinner=False)
+def get_chat_service():
+    """
+    Return the remote chat API client if CHAT_SERVICE_URL is set, else the in-process
+    service, warmed up by the preflight. Only the one in use is imported: a client
+    never loads the model, backends or knowledge index.
+    """
+    if CONFIG["chat_service_url"]:
+        from service_client import ChatServiceClient
+        service = ChatServiceClient(CONFIG["chat_service_url"])
+    else:
+        from chat_service import ChatService
+        service = ChatService()
+    bootstrap.preflight(service)
+    return service
+
+@st.cache_resource(show_spinner=False)
+def start_metrics():
+    """Serve /metrics for this process (METRICS_PORT; 0 disables it)."""
+    return metrics.start_metrics_server()
+
+def get_session_id():
+    """
+    Return this browser session's conversation id. It is kept in the URL, so a
+    reload or a restarted server resumes the same conversation.
+    """
+    if 'session_id' not in st.session_state:
+        session_id = st.query_params.get("session") or uuid.uuid4().hex
+        st.query_params["session"] = session_id
+        st.session_state.session_id = session_id
+    return st.session_state.session_id
+
+def record_rerun_time(started):
+    """Log the wall time of this rerun and keep the recent ones in the session."""
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    timings = st.session_state.setdefault("rerun_timings", [])
+    timings.append(elapsed_ms)
+    del timings[:-CONFIG["rerun_timing_window"]]
+    metrics.observe("insurance_rerun_seconds", elapsed_ms / 1000)
+    logger.info(f"Rerun took {elapsed_ms:.1f} ms")
+
 def main():
-    # Initialize components
-    ui = InsuranceChatbotUI()
-    llm = InsuranceLLM()
-    assistant = InsuranceAssistant()
+    started = time.perf_counter()
+    try:
+        run_app()
+    finally:
+        # Also runs when st.rerun() ends the script early
+        record_rerun_time(started)
+
+def run_app():
+    # Shared components
+    ui = get_ui()
+    service = get_chat_service()
+    start_metrics()
+    
+    # Display UI header
+    ui.display_header()
+    
+    # Chat history lives in the conversation store, not in the session
+    session_id = get_session_id()
+    chat_history = service.history(session_id)
     
     # Initialize session state variables if they don't exist
-    if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
     if 'current_insurance_type' not in st.session_state:
-        st.session_state.current_insurance_type = None
+        # A resumed conversation continues with the insurance type it last used
+        st.session_state.current_insurance_type = chat_history[-1].insurance_type if chat_history else None
     if 'loading' not in st.session_state:
         st.session_state.loading = False
     
-    # Display UI header
-    ui.display_header()
-    
     # Display country and language settings
     country, language = ui.display_settings()
     
+    # Display recent rerun timings when enabled
+    ui.display_rerun_timings(st.session_state.get("rerun_timings", []))
+    
     # Display chat history
-    ui.display_chat_history(st.session_state.chat_history)
+    ui.display_chat_history(chat_history)
     
     # Display insurance type selection buttons
     selected_type = ui.display_insurance_type_buttons()
@@ -46,28 +109,14 @@ def main():
     if st.session_state.loading and st.session_state.current_insurance_type:
         with st.spinner("Getting insurance information..."):
             try:
-                insurance_type_name = CONFIG["insurance_types"][st.session_state.current_insurance_type].split()[1]
-                # When an insurance type is selected, display info about it
-                insurance_info = llm.get_insurance_info(
-                    insurance_type_name,
-                    country, 
-                    language
-                )
-                
-                # Format with regulatory information
-                formatted_info = assistant.format_response(
-                    insurance_info,
+                # Add an overview of the selected type to the chat, as if the user asked about it
+                service.insurance_info(
+                    session_id,
                     st.session_state.current_insurance_type,
-                    country
+                    country,
+                    language
                 )
                 
-                # Add this to chat history as if user asked about this insurance type
-                user_msg = f"Tell me about {insurance_type_name} insurance in {country}."
-                st.session_state.chat_history.append({
-                    "user": user_msg,
-                    "assistant": formatted_info
-                })
-                
                 # Reset loading state
                 st.session_state.loading = False
                 st.rerun()  # Refresh to display the new message
@@ -82,59 +131,31 @@ def main():
     
     # Display clear chat button
     if ui.clear_chat_button():
-        st.session_state.chat_history = []
+        service.clear(session_id)
         st.session_state.current_insurance_type = None
+        ui.reset_chat_view()
         st.rerun()
     
     # Process user input
     if user_input:
-        # Add user message to chat history immediately
-        temp_history = st.session_state.chat_history + [{"user": user_input, "assistant": ""}]
+        # Show the new user message right away; the history above is already on the page
+        ui.display_message({"user": user_input, "assistant": ""})
         
-        # Show temporary chat history with user message
-        ui.display_chat_history(temp_history)
+        # Stream the response so partial output is shown as soon as it arrives.
+        # The service detects the insurance type if none is set yet, adds the
+        # regulatory note and stores the exchange (or a fallback if generation fails).
+        stream = service.chat_stream(
+            session_id,
+            user_input, 
+            country, 
+            language, 
+            st.session_state.current_insurance_type
+        )
+        ui.display_streaming_response(stream)
+        st.session_state.current_insurance_type = stream.insurance_type
         
-        # Show loading message
-        with st.spinner("Thinking..."):
-            # Detect insurance type from message if not already set
-            if not st.session_state.current_insurance_type:
-                detected_type = assistant.determine_insurance_type(user_input)
-                st.session_state.current_insurance_type = detected_type
-            
-            try:
-                # Generate response
-                response = llm.generate_response(
-                    user_input, 
-                    country, 
-                    language, 
-                    st.session_state.current_insurance_type,
-                    st.session_state.chat_history
-                )
-                
-                # Format response with regulatory information
-                formatted_response = assistant.format_response(
-                    response, 
-                    st.session_state.current_insurance_type, 
-                    country
-                )
-                
-                # Add to chat history
-                st.session_state.chat_history.append({
-                    "user": user_input,
-                    "assistant": formatted_response
-                })
-                
-            except Exception as e:
-                logger.error(f"Error generating response: {str(e)}")
-                # Use fallback response in case of error
-                error_response = CONFIG["fallback_responses"]["api_error"]
-                st.session_state.chat_history.append({
-                    "user": user_input,
-                    "assistant": error_response
-                })
-            
-            # Refresh UI to show the new message
-            st.rerun()
+        # Refresh UI to show the new message
+        st.rerun()
     
     # Display audio button
     ui.display_audio_button()
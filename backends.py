@@ -0,0 +1,296 @@
+import json
+import logging
+import threading
+import time
+import requests
+from config import CONFIG
+from http_client import get_session
+from resilience import RETRYABLE_STATUS_CODES, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+class BackendError(Exception):
+    """Raised when an inference backend fails to produce text."""
+    
+    # True on the copies of one failed upstream call handed to its other callers (see
+    # BatchingBackend), so the failure counts once against the circuit breaker
+    shared = False
+    
+    def __init__(self, message, status_code=None, retry_after=None, retryable=True):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+class BackendTimeout(BackendError):
+    """Raised when an inference backend does not answer in time."""
+
+
+class InferenceBackend:
+    """Interface for text generation backends used by InsuranceLLM."""
+    
+    name = "backend"
+    
+    @property
+    def endpoint(self):
+        """Identifier of the upstream endpoint, used to share one circuit breaker per endpoint."""
+        return self.name
+    
+    def generate(self, prompt, parameters, timeout):
+        """Return the generated text for a prompt. Raises BackendError on failure."""
+        raise NotImplementedError
+    
+    def stream(self, prompt, parameters, timeout):
+        """Yield generated text chunks for a prompt. Raises BackendError on failure."""
+        raise NotImplementedError
+    
+    def generate_batch(self, prompts, parameters, timeout):
+        """
+        Return one generated text per prompt, in order. An item is None if that prompt
+        failed while the rest succeeded; BackendError is raised if the whole batch failed.
+        """
+        return [self.generate(prompt, parameters, timeout) for prompt in prompts]
+    
+    def warm_up(self, timeout):
+        """Prepare for the first request (open a connection, load a model). Raises BackendError on failure."""
+
+
+class HuggingFaceBackend(InferenceBackend):
+    """Text generation over the Hugging Face inference HTTP API (or a compatible server)."""
+    
+    name = "huggingface"
+    
+    def __init__(self, model_id=None, api_key=None, base_url=None, session=None):
+        self.model_id = model_id or CONFIG["model_id"]
+        self.api_url = f"{base_url or CONFIG['api_base_url']}/{self.model_id}"
+        api_key = api_key if api_key is not None else CONFIG["huggingface_api_key"]
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.session = session or get_session()
+    
+    @property
+    def endpoint(self):
+        return self.api_url
+    
+    def warm_up(self, timeout):
+        # Leaves a keep-alive connection in the pool, so the first request skips the TCP and TLS handshakes
+        try:
+            self.session.head(self.api_url, headers=self.headers, timeout=timeout)
+        except requests.exceptions.Timeout as e:
+            raise BackendTimeout(f"Timed out connecting to {self.api_url}") from e
+        except requests.exceptions.RequestException as e:
+            raise BackendError(f"Could not connect to {self.api_url}: {str(e)}") from e
+    
+    def _payload(self, inputs, parameters, stream=False):
+        payload = {
+            "inputs": inputs,
+            "parameters": parameters,
+            "options": {
+                "wait_for_model": True  # This tells the API to wait if model is loading
+            }
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    def _raise_for_status(self, response):
+        """Log an unsuccessful response and raise the matching BackendError."""
+        if response.status_code == 503:
+            logger.warning(f"Model still loading or unavailable. Status: {response.status_code}")
+        else:
+            logger.error(f"API error: {response.status_code} - {response.text}")
+        raise BackendError(
+            f"API error: {response.status_code}",
+            status_code=response.status_code,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            retryable=response.status_code in RETRYABLE_STATUS_CODES
+        )
+    
+    def _post(self, inputs, parameters, timeout):
+        """Send a generation request and return the decoded JSON body."""
+        try:
+            response = self.session.post(self.api_url, headers=self.headers, json=self._payload(inputs, parameters), timeout=timeout)
+        except requests.exceptions.Timeout as e:
+            raise BackendTimeout("Request timed out") from e
+        except requests.exceptions.RequestException as e:
+            raise BackendError(str(e)) from e
+        
+        if response.status_code != 200:
+            self._raise_for_status(response)
+        
+        try:
+            return response.json()
+        except ValueError as e:
+            raise BackendError(f"Invalid JSON response: {str(e)}") from e
+    
+    def _extract_text(self, result, prompt):
+        """Return the generated text of one result, without the echoed prompt."""
+        if isinstance(result, list):
+            result = result[0] if result else {}
+        if not isinstance(result, dict):
+            return ""
+        generated_text = result.get("generated_text") or ""
+        # Clean up response - remove the prompt part if it's included
+        if generated_text.startswith(prompt):
+            generated_text = generated_text[len(prompt):].strip()
+        return generated_text
+    
+    def generate(self, prompt, parameters, timeout):
+        logger.info(f"Sending request to HuggingFace API for model: {self.model_id}")
+        result = self._post(prompt, parameters, timeout)
+        
+        # Extract the generated text from the response
+        if isinstance(result, list) and len(result) > 0:
+            return self._extract_text(result[0], prompt)
+        return ""
+    
+    def generate_batch(self, prompts, parameters, timeout):
+        logger.info(f"Sending batch of {len(prompts)} prompts to HuggingFace API for model: {self.model_id}")
+        results = self._post(list(prompts), parameters, timeout)
+        if not isinstance(results, list):
+            raise BackendError("Unexpected batch response")
+        # Items that errored or are missing come back as None and are retried on their own
+        return [
+            self._extract_text(results[i], prompt) or None if i < len(results) else None
+            for i, prompt in enumerate(prompts)
+        ]
+    
+    def stream(self, prompt, parameters, timeout):
+        logger.info(f"Streaming from HuggingFace API for model: {self.model_id}")
+        try:
+            with self.session.post(self.api_url, headers=self.headers, json=self._payload(prompt, parameters, stream=True),
+                                   timeout=timeout, stream=True) as response:
+                if response.status_code != 200:
+                    self._raise_for_status(response)
+                yield from self._iter_stream_tokens(response)
+        except requests.exceptions.Timeout as e:
+            raise BackendTimeout("Stream timed out") from e
+        except requests.exceptions.RequestException as e:
+            raise BackendError(str(e)) from e
+    
+    def _iter_stream_tokens(self, response):
+        """Yield token text from a server-sent events response of the inference API."""
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            try:
+                event = json.loads(line[len("data:"):])
+            except ValueError as e:
+                raise BackendError(f"Invalid stream event: {str(e)}") from e
+            if "error" in event:
+                raise BackendError(f"Stream error: {event['error']}")
+            token = event.get("token") or {}
+            if token.get("special"):
+                continue
+            if token.get("text"):
+                yield token["text"]
+
+
+class MockBackend(HuggingFaceBackend):
+    """HTTP backend pointed at the local stand-in server (`python mock_server.py`)."""
+    
+    name = "mock"
+    
+    def __init__(self, model_id=None, session=None):
+        super().__init__(model_id, api_key="", base_url=f"{CONFIG['mock_server_url']}/models", session=session)
+
+
+# llama.cpp models are large, so each model file is loaded once per process.
+# Maps model path -> (model, lock); a llama.cpp context handles one generation at a time.
+_llama_models = {}
+_llama_models_lock = threading.Lock()
+
+class LlamaCppBackend(InferenceBackend):
+    """
+    Local CPU inference on a GGUF model file through llama-cpp-python.
+    
+    A llama.cpp call can't be interrupted, so generation always streams and the
+    timeout is checked between tokens; waiting for the model's lock counts
+    towards it too. Errors from llama.cpp are raised as BackendError.
+    """
+    
+    name = "llamacpp"
+    
+    def __init__(self, model_path=None):
+        self.model_path = model_path or CONFIG["local_model_path"]
+    
+    @property
+    def endpoint(self):
+        return f"llamacpp:{self.model_path}"
+    
+    def warm_up(self, timeout):
+        self._model()
+    
+    def _model(self):
+        """Return the loaded model and the lock guarding it, loading the model on first use."""
+        with _llama_models_lock:
+            if self.model_path not in _llama_models:
+                try:
+                    from llama_cpp import Llama
+                except ImportError as e:
+                    raise BackendError("llama-cpp-python is not installed", retryable=False) from e
+                logger.info(f"Loading local model from {self.model_path}")
+                try:
+                    model = Llama(
+                        model_path=self.model_path,
+                        n_ctx=CONFIG["local_model_context"],
+                        n_threads=CONFIG["local_model_threads"],
+                        verbose=False
+                    )
+                except Exception as e:
+                    raise BackendError(f"Could not load local model: {str(e)}", retryable=False) from e
+                _llama_models[self.model_path] = (model, threading.Lock())
+            return _llama_models[self.model_path]
+    
+    def _arguments(self, parameters):
+        return {
+            "max_tokens": parameters.get("max_new_tokens", 512),
+            "temperature": parameters.get("temperature", 0.7) if parameters.get("do_sample", True) else 0.0,
+            "top_p": parameters.get("top_p", 0.95)
+        }
+    
+    def generate(self, prompt, parameters, timeout):
+        return "".join(self.stream(prompt, parameters, timeout)).strip()
+    
+    def stream(self, prompt, parameters, timeout):
+        model, lock = self._model()
+        deadline = time.monotonic() + timeout
+        if not lock.acquire(timeout=max(0.0, timeout)):
+            raise BackendTimeout("Local model is busy with another generation")
+        chunks = None
+        try:
+            chunks = model(prompt, stream=True, **self._arguments(parameters))
+            for chunk in chunks:
+                if time.monotonic() > deadline:
+                    raise BackendTimeout(f"Local generation took longer than {timeout:.0f}s")
+                text = chunk["choices"][0]["text"]
+                if text:
+                    yield text
+        except BackendError:
+            raise
+        except ValueError as e:
+            # e.g. the prompt doesn't fit in the context window; the same prompt would fail again
+            raise BackendError(f"Local generation failed: {str(e)}", retryable=False) from e
+        except Exception as e:
+            raise BackendError(f"Local generation failed: {str(e)}") from e
+        finally:
+            # Stop llama.cpp before another generation may use the model
+            if hasattr(chunks, "close"):
+                chunks.close()
+            lock.release()
+
+
+BACKENDS = {
+    "huggingface": HuggingFaceBackend,
+    "mock": MockBackend,
+    "llamacpp": LlamaCppBackend
+}
+
+def create_backend(name, session=None):
+    """Create an inference backend by name ("huggingface", "mock" or "llamacpp")."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name}")
+    if name == "llamacpp":
+        return LlamaCppBackend()
+    return BACKENDS[name](session=session)
@@ -0,0 +1,165 @@
+import copy
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from config import CONFIG
+from backends import BackendError, BackendTimeout, InferenceBackend
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    """A prompt waiting to be sent as part of a batch."""
+
+    def __init__(self, prompt, parameters, timeout):
+        self.prompt = prompt
+        self.parameters = parameters
+        self.timeout = timeout
+        self.future = Future()
+
+
+class BatchingBackend(InferenceBackend):
+    """
+    Wraps a backend that accepts batched inputs and merges concurrent generate
+    calls into batch requests.
+
+    A collector thread waits up to max_wait for up to max_batch_size prompts with
+    the same generation parameters, sends them as one request and hands each
+    caller its own result. If the batch succeeds but some items come back empty
+    or failed, those callers retry individually. Streaming is not batched.
+    """
+
+    def __init__(self, backend, max_batch_size=None, max_wait=None, max_concurrency=None):
+        self.backend = backend
+        self.max_batch_size = max_batch_size or CONFIG["batch_max_size"]
+        self.max_wait = max_wait if max_wait is not None else CONFIG["batch_max_wait_ms"] / 1000
+        self.batches_sent = 0
+        self.requests_batched = 0
+        self._stats_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency or CONFIG["batch_max_concurrency"],
+            thread_name_prefix="batch-sender"
+        )
+        self._collector = threading.Thread(target=self._collect, name="batch-collector", daemon=True)
+        self._collector.start()
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    @property
+    def endpoint(self):
+        return self.backend.endpoint
+
+    def generate(self, prompt, parameters, timeout):
+        request = _PendingRequest(prompt, parameters, timeout)
+        self._queue.put(request)
+        try:
+            result = request.future.result(timeout=timeout + self.max_wait)
+        except FutureTimeoutError as e:
+            raise BackendTimeout("Batched request timed out") from e
+
+        if result is None:
+            # This item failed inside an otherwise successful batch
+            logger.info("Retrying a failed batch item as a single request")
+            return self.backend.generate(prompt, parameters, timeout)
+        return result
+
+    def stream(self, prompt, parameters, timeout):
+        return self.backend.stream(prompt, parameters, timeout)
+
+    def warm_up(self, timeout):
+        self.backend.warm_up(timeout)
+
+    def _collect(self):
+        """Group queued requests into batches and hand them to the sender pool."""
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Only prompts with identical generation parameters can share a request
+            groups = {}
+            for request in batch:
+                groups.setdefault(json.dumps(request.parameters, sort_keys=True), []).append(request)
+            for requests in groups.values():
+                self._executor.submit(self._send, requests)
+
+    def _send(self, requests):
+        """Send one batch and resolve the futures of its callers."""
+        with self._stats_lock:
+            self.batches_sent += 1
+            self.requests_batched += len(requests)
+        if len(requests) == 1:
+            request = requests[0]
+            try:
+                request.future.set_result(self.backend.generate(request.prompt, request.parameters, request.timeout))
+            except Exception as e:
+                request.future.set_exception(e)
+            return
+
+        try:
+            results = self.backend.generate_batch(
+                [request.prompt for request in requests],
+                requests[0].parameters,
+                max(request.timeout for request in requests)
+            )
+        except BackendError as e:
+            # The whole batch failed: every caller sees the error and retries through its own policy
+            self._fail(requests, e)
+            return
+        except Exception as e:
+            self._fail(requests, BackendError(str(e)))
+            return
+
+        logger.info(f"Sent a batch of {len(requests)} prompts")
+        for request, result in zip(requests, results):
+            request.future.set_result(result or None)
+        for request in requests[len(results):]:
+            request.future.set_result(None)
+
+    @staticmethod
+    def _fail(requests, error):
+        """
+        Hand the error of a failed batch request to every caller. Only the first caller's
+        error counts against the circuit breaker; the others get copies marked shared.
+        """
+        requests[0].future.set_exception(error)
+        for request in requests[1:]:
+            shared = copy.copy(error)
+            shared.shared = True
+            request.future.set_exception(shared)
+
+    def stats(self):
+        """Return batching counters."""
+        with self._stats_lock:
+            return {
+                "batches_sent": self.batches_sent,
+                "requests_batched": self.requests_batched,
+                "average_batch_size": self.requests_batched / self.batches_sent if self.batches_sent else 0.0,
+                "queued": self._queue.qsize()
+            }
+
+
+# One batcher per upstream endpoint, shared by every InsuranceLLM instance
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+def get_batching_backend(backend):
+    """Return the process-wide batching wrapper for a backend's endpoint."""
+    with _batchers_lock:
+        if backend.endpoint not in _batchers:
+            _batchers[backend.endpoint] = BatchingBackend(backend)
+        return _batchers[backend.endpoint]
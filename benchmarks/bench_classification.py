@@ -0,0 +1,56 @@
+"""
+Throughput benchmark for the batch classification API over a synthetic corpus.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_classification --messages 200000 --processes 1 4
+
+Process counts above the number of CPUs are capped, and inputs shorter than
+CONFIG["classify_parallel_min_messages"] are classified in process (see classify_messages).
+"""
+import argparse
+import random
+import time
+import bootstrap
+from config import CONFIG
+from insurance_logic import classify_messages
+
+FILLER = (
+    "I would like to know more about my options", "can you explain the coverage",
+    "what does the policy include", "how much would it cost per month",
+    "is there a waiting period", "please help me understand the claims process",
+    "my application was rejected last week", "what documents do I need"
+)
+
+def synthetic_corpus(count, seed=42):
+    """Yield synthetic chat messages mixing insurance keywords and filler text."""
+    rng = random.Random(seed)
+    keywords = [word for words in CONFIG["insurance_keywords"]["English"].values() for word in words]
+    countries = CONFIG["countries"]
+    for i in range(count):
+        words = rng.sample(FILLER, 2) + rng.sample(keywords, rng.randint(0, 3))
+        rng.shuffle(words)
+        yield {"id": i, "message": " ".join(words).capitalize() + "?", "country": rng.choice(countries)}
+
+def run(count, processes, batch_size):
+    """Classify count synthetic messages and return the throughput in messages per second."""
+    start = time.perf_counter()
+    classified = 0
+    for _ in classify_messages(synthetic_corpus(count), processes=processes, batch_size=batch_size):
+        classified += 1
+    elapsed = time.perf_counter() - start
+    return classified / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch insurance type classification.")
+    parser.add_argument("--messages", type=int, default=100000, help="Number of synthetic messages")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 4], help="Process counts to compare")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Messages per batch")
+    args = parser.parse_args()
+    
+    bootstrap.init()
+    for processes in args.processes:
+        throughput = run(args.messages, processes, args.batch_size)
+        print(f"processes={processes:<3} messages={args.messages:<9} throughput={throughput:,.0f} msg/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Micro-benchmarks for the hot functions on the request path.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_micro                       # all benchmarks
+    python -m benchmarks.bench_micro --only classify prompt --rounds 50
+
+Each benchmark is timed over --rounds rounds of enough calls to take about 0.2 s;
+per-call percentiles are taken across rounds. Results are written as JSON
+(see benchmarks/compare.py).
+"""
+import argparse
+import logging
+import statistics
+import time
+import bootstrap
+from config import CONFIG
+from insurance_logic import InsuranceAssistant
+from model import InsuranceLLM
+from response_cache import MemoryResponseCache, make_cache_key
+from prompt_builder import estimate_tokens
+from benchmarks.common import peak_memory_mb, percentiles, write_results
+
+MESSAGES = [
+    "Is car insurance mandatory in India?",
+    "My house was flooded last night, will my policy pay for the damage?",
+    "What is the waiting period for pre-existing conditions in a health plan?",
+    "How much life cover do I need for a family of four?",
+    "Does travel insurance cover cancelled flights?",
+    "Can I get a discount on my premium if I install an alarm?",
+    "Quelle assurance auto est obligatoire en France ?",
+    "Hello, can you help me?"
+]
+
+def _history(turns):
+    """Return a chat history of the given length with realistic answer sizes."""
+    answer = "You should compare policies on coverage, exclusions and premium. " * 12
+    return [{"user": MESSAGES[i % len(MESSAGES)], "assistant": answer} for i in range(turns)]
+
+def build_benchmarks():
+    """Return {name: zero-argument callable} for every micro-benchmark."""
+    assistant = InsuranceAssistant()
+    # Retrieval and prompt assembly only; nothing here calls a backend
+    llm = InsuranceLLM(cache=MemoryResponseCache(1, 1))
+    history = _history(10)
+    response = "Third-party motor insurance is compulsory. " * 20
+    counter = iter(range(10 ** 12))
+    # A long document that mentions no insurance type, the worst case for classification
+    document = " ".join(["the", "quarterly", "report", "was", "filed", "on", "time", "and", "reviewed"] * 2223)
+
+    return {
+        "classify": lambda: [assistant.determine_insurance_type(m) for m in MESSAGES],
+        "classify_multilingual": lambda: [assistant.determine_insurance_type(m, "French") for m in MESSAGES],
+        "classify_long_text": lambda: assistant.determine_insurance_type(document),
+        "format_response": lambda: assistant.format_response(response, "auto", "India"),
+        "retrieval_search": lambda: llm._retrieve_passages(MESSAGES[0], "India", "auto"),
+        "retrieval_answer": lambda: llm._answer_from_retrieval(MESSAGES[0], "India", "English", "auto"),
+        "faq_route": lambda: [llm.faq_router.route(m, "India") for m in MESSAGES],
+        "prompt": lambda: llm._build_prompt(MESSAGES[1], "India", "English", "home", history),
+        "prompt_no_history": lambda: llm._build_prompt(MESSAGES[1], "India", "English", "home"),
+        "estimate_tokens": lambda: estimate_tokens(response),
+        "cache_key": lambda: make_cache_key(CONFIG["model_id"], f"{response}{next(counter)}", llm.generation_parameters)
+    }
+
+def measure(fn, rounds, target_seconds=0.2):
+    """Time fn and return per-call statistics in microseconds."""
+    # Calibrate the number of calls per round
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= target_seconds / 10 or number >= 10 ** 6:
+            break
+        number *= 2
+    number = max(1, int(number * target_seconds / max(elapsed, 1e-9) / 10))
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+
+    mean = statistics.fmean(samples)
+    return {
+        "calls_per_round": number,
+        "mean_us": mean,
+        **{f"{k}_us": v for k, v in percentiles(samples).items()},
+        "ops_per_second": 1e6 / mean
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run micro-benchmarks of the hot functions.")
+    parser.add_argument("--only", nargs="+", help="Benchmarks to run (default: all)")
+    parser.add_argument("--rounds", type=int, default=20, help="Timed rounds per benchmark")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/micro-<commit>.json)")
+    args = parser.parse_args()
+
+    bootstrap.init()
+    # Per-call INFO logs (prompt sizes, cache hits) would dominate the timings
+    logging.disable(logging.INFO)
+
+    benchmarks = build_benchmarks()
+    names = args.only or list(benchmarks)
+    unknown = set(names) - set(benchmarks)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in names:
+        results[name] = measure(benchmarks[name], args.rounds)
+        stats = results[name]
+        print(f"{name:<22} mean={stats['mean_us']:>10.1f} us  p95={stats['p95_us']:>10.1f} us  "
+              f"{stats['ops_per_second']:>12,.0f} ops/s")
+    results["peak_memory_mb"] = peak_memory_mb()
+
+    print(f"Results written to {write_results('micro', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Usage (from the repository root):
+    python -m benchmarks.compare benchmarks/results/micro-abc123.json benchmarks/results/micro-def456.json
+    python -m benchmarks.compare base.json new.json --threshold 5
+
+Exits with status 1 if any tracked metric got worse by more than the threshold (percent).
+"""
+import argparse
+import json
+import sys
+
+# Metrics where a larger value is an improvement; for every other tracked metric smaller is better
+HIGHER_IS_BETTER = ("ops_per_second", "throughput", "hit_rate")
+# Leaf names that are compared; counters such as calls_per_round or config values are not
+TRACKED = ("_us", "_ms", "p50", "p95", "p99", "mean", "ops_per_second", "throughput", "hit_rate", "memory_mb")
+
+def flatten(results, prefix=""):
+    """Return {"a.b.c": number} for every numeric leaf of a nested dict."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def is_tracked(name):
+    return any(part in name for part in TRACKED) and not name.startswith("config.")
+
+def compare(base, new, threshold):
+    """Return rows of (metric, base, new, change %, regressed) for metrics present in both results."""
+    base_flat, new_flat = flatten(base["results"]), flatten(new["results"])
+    rows = []
+    for name in sorted(set(base_flat) & set(new_flat)):
+        if not is_tracked(name):
+            continue
+        old_value, new_value = base_flat[name], new_flat[name]
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        worse = -change if any(part in name for part in HIGHER_IS_BETTER) else change
+        rows.append((name, old_value, new_value, change, worse > threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base", help="Results of the baseline commit")
+    parser.add_argument("new", help="Results of the commit under test")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed change in percent before flagging")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    if base.get("benchmark") != new.get("benchmark"):
+        parser.error(f"Cannot compare '{base.get('benchmark')}' results with '{new.get('benchmark')}' results")
+
+    print(f"{base.get('benchmark')}: {base.get('commit')} -> {new.get('commit')}")
+    rows = compare(base, new, args.threshold)
+    for name, old_value, new_value, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<40} {old_value:>14.2f} {new_value:>14.2f} {change:>+8.1f}%{flag}")
+
+    regressions = sum(1 for row in rows if row[4])
+    print(f"{regressions} regression(s) over {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Load generator that replays a multi-session chat workload through the full request path
+(ChatService -> InsuranceLLM -> HTTP backend) against the local stand-in server.
+
+Usage (from the repository root):
+    python -m benchmarks.load_test --sessions 50 --turns 5 --concurrency 16
+    python -m benchmarks.load_test --sessions 200 --record workload.jsonl   # also save the workload
+    python -m benchmarks.load_test --workload workload.jsonl                # replay a saved workload
+    python -m benchmarks.load_test --server-url http://127.0.0.1:8089       # use a running mock_server.py
+
+A workload is JSONL with one turn per line:
+    {"session": "s1", "turn": 0, "message": "...", "country": "India", "language": "English", "think_ms": 500}
+Turns of a session run in order; sessions run concurrently. Reports time to first chunk
+and full-response latency percentiles, throughput, cache hit rates and memory, and writes
+them as JSON (see benchmarks/compare.py).
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import bootstrap
+from config import CONFIG
+import mock_server
+from admission import AdmissionController
+from backends import create_backend
+from chat_service import ChatService
+from conversation_store import MemoryConversationStore
+from model import InsuranceLLM, _inflight_requests
+from overviews import OverviewStore
+from resilience import event_counts
+from response_cache import MemoryResponseCache
+from benchmarks.common import peak_memory_mb, percentiles, write_results
+
+QUESTIONS = [
+    "Is car insurance mandatory?",
+    "How do I file a claim after a car accident?",
+    "What does home insurance cover?",
+    "Does my home policy cover flood damage?",
+    "What is a deductible?",
+    "How can I lower my health insurance premium?",
+    "Are pre-existing conditions covered by health insurance?",
+    "How much life insurance do I need?",
+    "What is the difference between term and whole life insurance?",
+    "Does travel insurance cover lost luggage?",
+    "Do I need travel insurance for a short trip?",
+    "What documents do I need to make a claim?",
+    "Can I cancel my policy early?",
+    "Why was my claim rejected?",
+    "Is my business required to have insurance?",
+    "What is third-party liability cover?"
+]
+
+def synthetic_workload(sessions, turns, seed=42, think_ms=500):
+    """
+    Return a list of turns for sessions x turns. Questions follow a skewed popularity
+    distribution, so popular ones repeat across sessions the way real traffic does.
+    """
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(QUESTIONS))]
+    workload = []
+    for session in range(sessions):
+        country = rng.choice(CONFIG["countries"])
+        language = "English" if rng.random() < 0.8 else rng.choice(CONFIG["supported_languages"])
+        for turn in range(turns):
+            workload.append({
+                "session": f"s{session}",
+                "turn": turn,
+                "message": rng.choices(QUESTIONS, weights)[0],
+                "country": country,
+                "language": language,
+                "think_ms": rng.uniform(0, 2 * think_ms)
+            })
+    return workload
+
+def load_workload(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def save_workload(workload, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for turn in workload:
+            f.write(json.dumps(turn, ensure_ascii=False) + "\n")
+
+
+class LoadTest:
+    """Runs a workload through a ChatService and collects per-turn timings."""
+
+    def __init__(self, service, mode="stream", think_scale=1.0):
+        self.service = service
+        self.mode = mode
+        self.think_scale = think_scale
+        self.first_chunk_ms = []
+        self.latency_ms = []
+        self.fallbacks = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def run_turn(self, turn):
+        time.sleep(turn.get("think_ms", 0) * self.think_scale / 1000)
+        start = time.perf_counter()
+        first_chunk = None
+        try:
+            if self.mode == "stream":
+                stream = self.service.chat_stream(turn["session"], turn["message"], turn["country"], turn["language"])
+                for _ in stream:
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - start
+                answer = stream.turn.assistant
+            else:
+                answer = self.service.chat(turn["session"], turn["message"], turn["country"], turn["language"]).assistant
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Turn failed: {str(e)}")
+            with self._lock:
+                self.errors += 1
+            return
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.latency_ms.append(elapsed * 1000)
+            self.first_chunk_ms.append((first_chunk if first_chunk is not None else elapsed) * 1000)
+            if any(answer.startswith(text) for text in CONFIG["fallback_responses"].values()):
+                self.fallbacks += 1
+
+    def run_session(self, turns):
+        for turn in sorted(turns, key=lambda t: t["turn"]):
+            self.run_turn(turn)
+
+    def run(self, workload, concurrency):
+        sessions = defaultdict(list)
+        for turn in workload:
+            sessions[turn["session"]].append(turn)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(self.run_session, sessions.values()))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a chat workload against the local stand-in backend.")
+    parser.add_argument("--workload", help="JSONL workload to replay (default: synthetic)")
+    parser.add_argument("--record", help="Save the workload that was run to this JSONL file")
+    parser.add_argument("--sessions", type=int, default=50, help="Synthetic sessions")
+    parser.add_argument("--turns", type=int, default=5, help="Synthetic turns per session")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=16, help="Sessions running at once")
+    parser.add_argument("--think-scale", type=float, default=0.0,
+                        help="Multiplier for recorded think times between turns (0 = back to back)")
+    parser.add_argument("--mode", choices=["stream", "blocking"], default="stream")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="Apply the configured per-session and global rate limits (the admission queue always applies)")
+    parser.add_argument("--server-url", help="Use a running mock_server.py instead of starting one")
+    parser.add_argument("--latency-ms", type=float, default=100, help="Latency of the started stand-in server")
+    parser.add_argument("--token-delay-ms", type=float, default=2, help="Token delay of the started stand-in server")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Error rate of the started stand-in server")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+
+    bootstrap.init()
+    logging.disable(logging.WARNING)
+
+    workload = load_workload(args.workload) if args.workload else synthetic_workload(args.sessions, args.turns, args.seed)
+    if args.record:
+        save_workload(workload, args.record)
+
+    server = None
+    if args.server_url:
+        CONFIG["mock_server_url"] = args.server_url
+    else:
+        server = mock_server.create_server(
+            port=0,
+            latency_ms=args.latency_ms,
+            token_delay_ms=args.token_delay_ms,
+            error_rate=args.error_rate
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        CONFIG["mock_server_url"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Fresh in-memory state, so runs are comparable. Replayed turns come faster than
+    # real users type, so rate limits are off unless asked for.
+    llm = InsuranceLLM(
+        cache=MemoryResponseCache(CONFIG["response_cache_max_entries"], CONFIG["response_cache_ttl"]),
+        backend=create_backend("mock"),
+        admission=AdmissionController() if args.rate_limits else AdmissionController(session_rpm=0, global_rpm=0)
+    )
+    conversations = MemoryConversationStore()
+    service = ChatService(llm=llm, conversations=conversations, overviews=OverviewStore())
+
+    test = LoadTest(service, args.mode, args.think_scale)
+    duration = test.run(workload, args.concurrency)
+    if server:
+        server.shutdown()
+
+    completed = len(test.latency_ms)
+    results = {
+        "config": {
+            "turns": len(workload),
+            "concurrency": args.concurrency,
+            "mode": args.mode,
+            "rate_limits": args.rate_limits,
+            "workload": args.workload or f"synthetic:{args.sessions}x{args.turns}:seed{args.seed}",
+            "server": args.server_url or {"latency_ms": args.latency_ms, "token_delay_ms": args.token_delay_ms,
+                                          "error_rate": args.error_rate}
+        },
+        "completed": completed,
+        "errors": test.errors,
+        "fallbacks": test.fallbacks,
+        "duration_s": duration,
+        "throughput_turns_per_s": completed / duration if duration else 0.0,
+        "latency_ms": percentiles(test.latency_ms),
+        "first_chunk_ms": percentiles(test.first_chunk_ms),
+        "response_cache": llm.cache.stats(),
+        "singleflight": _inflight_requests.stats(),
+        "admission": llm.admission.stats(),
+        "upstream_requests": server.RequestHandlerClass.settings.requests if server else None,
+        "resilience": event_counts(),
+        "conversations": conversations.stats(),
+        "peak_memory_mb": peak_memory_mb()
+    }
+
+    latency, first_chunk = results["latency_ms"], results["first_chunk_ms"]
+    print(f"turns={completed}/{len(workload)} errors={test.errors} fallbacks={test.fallbacks} "
+          f"throughput={results['throughput_turns_per_s']:.1f} turns/s")
+    if completed:
+        print(f"latency     p50={latency['p50']:.0f} ms  p95={latency['p95']:.0f} ms  p99={latency['p99']:.0f} ms")
+        print(f"first chunk p50={first_chunk['p50']:.0f} ms  p95={first_chunk['p95']:.0f} ms  "
+              f"p99={first_chunk['p99']:.0f} ms")
+    print(f"cache hit rate={results['response_cache']['hit_rate']:.1%}  upstream requests={results['upstream_requests']}  "
+          f"peak memory={results['peak_memory_mb']:.0f} MB")
+    print(f"Results written to {write_results('load', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Start-up profile: import time of the entry modules and the time of each preflight step.
+
+Usage (from the repository root):
+    python -m benchmarks.startup                              # all entry modules, then the preflight
+    python -m benchmarks.startup --modules app api --repeat 10 --top 15
+    python -m benchmarks.startup --no-preflight
+
+Every import is timed in a fresh interpreter with `python -X importtime`, so nothing is
+cached between runs; the report lists the top-level packages that cost the most. The
+preflight runs in this process against the local stand-in server. Results are written as
+JSON (see benchmarks/compare.py).
+"""
+import argparse
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+import bootstrap
+from benchmarks.common import peak_memory_mb, write_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["config", "chat_service", "service_client", "api", "app"]
+
+def parse_importtime(output, module):
+    """
+    Return (total ms, {top-level package: self ms}) for the imports made by `import module`,
+    from the stderr of `python -X importtime`.
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+
+    # Lines are printed as imports finish, so everything since the previous top-level
+    # import belongs to the target (interpreter start-up imports come first)
+    end = next(i for i, row in enumerate(rows) if row[2] == 0 and row[3] == module)
+    start = max((i for i in range(end) if rows[i][2] == 0), default=-1) + 1
+    packages = defaultdict(float)
+    for self_us, _, _, name in rows[start:end + 1]:
+        packages[name.split(".")[0]] += self_us / 1000
+    return rows[end][1] / 1000, packages
+
+def profile_import(module, repeat):
+    """Import a module in repeat fresh interpreters; return median import and process times in ms."""
+    imports, processes = [], []
+    packages = defaultdict(list)
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, env=env, capture_output=True, text=True
+        )
+        processes.append((time.perf_counter() - started) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed: {result.stderr.strip().splitlines()[-1]}")
+        total, by_package = parse_importtime(result.stderr, module)
+        imports.append(total)
+        for package, ms in by_package.items():
+            packages[package].append(ms)
+    return {
+        "import_ms": statistics.median(imports),
+        "process_ms": statistics.median(processes),
+        "packages_ms": {package: statistics.median(times) for package, times in packages.items()}
+    }
+
+def profile_preflight():
+    """Create an in-process ChatService against the local stand-in server and time its preflight."""
+    import mock_server
+    from config import CONFIG
+    from backends import create_backend
+    from chat_service import ChatService
+    from conversation_store import MemoryConversationStore
+    from model import InsuranceLLM
+    from overviews import OverviewStore
+    from response_cache import MemoryResponseCache
+
+    server = mock_server.create_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    CONFIG["mock_server_url"] = f"http://127.0.0.1:{server.server_address[1]}"
+    CONFIG["preflight_enabled"] = True
+    try:
+        llm = InsuranceLLM(
+            cache=MemoryResponseCache(CONFIG["response_cache_max_entries"], CONFIG["response_cache_ttl"]),
+            backend=create_backend("mock")
+        )
+        service = ChatService(llm=llm, conversations=MemoryConversationStore(), overviews=OverviewStore())
+        started = time.perf_counter()
+        timings = bootstrap.preflight(service)
+        total = time.perf_counter() - started
+    finally:
+        server.shutdown()
+    return {"total_ms": total * 1000, **{f"{name}_ms": seconds * 1000 for name, seconds in timings.items()}}
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time and the preflight.")
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="Modules to import (default: the entry modules)")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages listed per module")
+    parser.add_argument("--no-preflight", action="store_true", help="Only profile imports")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/startup-<commit>.json)")
+    args = parser.parse_args()
+
+    bootstrap.init()
+    logging.disable(logging.INFO)
+
+    results = {"imports": {}}
+    for module in args.modules:
+        stats = profile_import(module, args.repeat)
+        heaviest = sorted(stats["packages_ms"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        stats["packages_ms"] = dict(heaviest)
+        results["imports"][module] = stats
+        print(f"{module:<16} import={stats['import_ms']:>8.1f} ms  process={stats['process_ms']:>8.1f} ms")
+        print("    " + "  ".join(f"{package} {ms:.1f}" for package, ms in heaviest))
+
+    if not args.no_preflight:
+        results["preflight_ms"] = profile_preflight()
+        print("preflight        " + "  ".join(
+            f"{name[:-3]}={ms:.1f} ms" for name, ms in results["preflight_ms"].items()))
+    results["peak_memory_mb"] = peak_memory_mb()
+
+    print(f"Results written to {write_results('startup', results, args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Process start-up in one place: environment variables, logging, and the preflight a
+worker runs before it takes traffic.
+
+Entry points (app.py, api.py, prewarm.py, the benchmarks) call init(); library modules
+only create their loggers. config.py calls load_environment() itself, because CONFIG
+reads the environment when it is imported.
+
+Usage:
+    python bootstrap.py              # run the preflight of an in-process ChatService and print the timings
+"""
+import logging
+import os
+import threading
+import time
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+ENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+
+_environment_loaded = False
+_logging_configured = False
+_init_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+def load_environment():
+    """Load variables from the .env file next to this module, once. Variables already set win."""
+    global _environment_loaded
+    with _init_lock:
+        if _environment_loaded:
+            return
+        _environment_loaded = True
+        # python-dotenv is only imported when there is a file to read; deployments usually set the environment
+        if os.path.exists(ENV_PATH):
+            from dotenv import load_dotenv
+            load_dotenv(ENV_PATH)
+
+def configure_logging(level=None):
+    """Configure the root logger once (LOG_LEVEL, default INFO)."""
+    global _logging_configured
+    with _init_lock:
+        if _logging_configured:
+            return
+        _logging_configured = True
+        logging.basicConfig(level=level or os.getenv("LOG_LEVEL", "INFO").upper(), format=LOG_FORMAT)
+
+def init():
+    """Prepare the process: environment and logging. Safe to call more than once."""
+    load_environment()
+    configure_logging()
+
+def preflight(service):
+    """
+    Warm a chat service (ChatService or ChatServiceClient) before it takes traffic:
+    load the data the first request would otherwise load and open upstream connections.
+    Returns the seconds each step took, or {} when CONFIG["preflight_enabled"] is off.
+    """
+    from config import CONFIG
+    if not CONFIG["preflight_enabled"]:
+        return {}
+    started = time.perf_counter()
+    timings = service.warm_up()
+    total = time.perf_counter() - started
+    steps = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items())
+    logger.info(f"Preflight finished in {total * 1000:.0f} ms ({steps})")
+    return timings
+
+if __name__ == "__main__":
+    init()
+    started = time.perf_counter()
+    from chat_service import ChatService
+    service = ChatService()
+    logger.info(f"Imported and created the chat service in {(time.perf_counter() - started) * 1000:.0f} ms")
+    for name, seconds in preflight(service).items():
+        print(f"{name:<12} {seconds * 1000:>8.1f} ms")
@@ -0,0 +1,160 @@
+import logging
+import time
+from config import CONFIG
+from model import InsuranceLLM
+from insurance_logic import InsuranceAssistant, classify_messages, get_keyword_matcher
+from regulations import get_regulations_store
+from overviews import OverviewStore, insurance_type_name
+from conversation_store import get_conversation_store
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ChatStream:
+    """
+    The response chunks of one chat turn. Iterating yields the chunks as they are
+    generated; when iteration ends, .turn holds the stored turn (including the
+    regulatory note) and .insurance_type the type the turn was answered for.
+    """
+
+    def __init__(self, session_id, insurance_type, chunks, finish, trace=None):
+        self.session_id = session_id
+        self.insurance_type = insurance_type
+        self.turn = None
+        self._chunks = chunks
+        self._finish = finish
+        self._trace = trace or metrics.RequestTrace("chat_stream", session_id=session_id)
+
+    def __iter__(self):
+        # The consumer may pull each chunk from a different thread or context,
+        # so the trace is made current around every step instead of once
+        response = ""
+        chunks = iter(self._chunks)
+        try:
+            while True:
+                with self._trace.active():
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                self._trace.mark_first_chunk()
+                response += chunk
+                yield chunk
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            response = None
+        with self._trace.active():
+            self.turn = self._finish(response)
+        self._trace.finish(insurance_type=self.insurance_type, response_chars=len(self.turn.assistant))
+
+
+class ChatService:
+    """
+    Handles whole chat turns: insurance type detection, generation, the regulatory
+    note and conversation history. The Streamlit app uses it in-process, and api.py
+    serves it over HTTP; service_client.ChatServiceClient has the same methods.
+    """
+
+    def __init__(self, llm=None, assistant=None, conversations=None, overviews=None, refresh_history=False):
+        self.llm = llm or InsuranceLLM()
+        self.assistant = assistant or InsuranceAssistant()
+        self.conversations = conversations or get_conversation_store()
+        self.overviews = overviews if overviews is not None else OverviewStore.load()
+        # Reload history on every turn when other processes write to the same store
+        self.refresh_history = refresh_history
+
+    def warm_up(self):
+        """
+        Load what the first request would otherwise load and open the upstream
+        connections. Returns the seconds each step took; a failed step is logged, not raised.
+        """
+        steps = (
+            ("classifier", lambda: [get_keyword_matcher(language) for language in CONFIG["supported_languages"]]),
+            ("regulations", get_regulations_store),
+            ("knowledge", self.llm.load_knowledge),
+            ("backends", self.llm.connect)
+        )
+        timings = {}
+        for name, step in steps:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"Preflight step '{name}' failed: {str(e)}")
+            timings[name] = time.perf_counter() - started
+        return timings
+
+    def history(self, session_id):
+        """Return the turns of a conversation, oldest first."""
+        with metrics.span("history"):
+            return self.conversations.history(session_id, refresh=self.refresh_history)
+    
+    def _store_turn(self, session_id, user, assistant, country, language, insurance_type):
+        """Append an exchange to the conversation and return the new turn."""
+        metrics.observe("insurance_response_chars", len(assistant))
+        with metrics.span("store"):
+            return self.conversations.append(session_id, user, assistant, country, language, insurance_type)
+
+    def clear(self, session_id):
+        """Delete a conversation."""
+        self.conversations.clear(session_id)
+
+    def insurance_info(self, session_id, insurance_type, country, language):
+        """Add an overview of an insurance type to the conversation and return the new turn."""
+        with metrics.request_trace("insurance_info", session_id=session_id, insurance_type=insurance_type):
+            type_name = insurance_type_name(insurance_type)
+
+            # Serve the pre-generated overview if it was built from the current prompt
+            insurance_info = self.overviews.get(
+                insurance_type,
+                country,
+                language,
+                self.llm.insurance_info_fingerprint(type_name, country, language)
+            )
+            if insurance_info is None:
+                insurance_info = self.llm.get_insurance_info(type_name, country, language, session_id=session_id)
+
+            # Add this to chat history as if user asked about this insurance type
+            return self._store_turn(
+                session_id,
+                f"Tell me about {type_name} insurance in {country}.",
+                self.assistant.format_response(insurance_info, insurance_type, country),
+                country, language, insurance_type
+            )
+
+    def chat(self, session_id, message, country, language, insurance_type=None):
+        """Answer a message, add the exchange to the conversation and return the new turn."""
+        with metrics.request_trace("chat", session_id=session_id):
+            insurance_type = insurance_type or self.assistant.determine_insurance_type(message, language)
+            history = self.history(session_id)
+            try:
+                response = self.llm.generate_response(message, country, language, insurance_type, history, session_id=session_id)
+                response = self.assistant.format_response(response, insurance_type, country)
+            except Exception as e:
+                logger.error(f"Error generating response: {str(e)}")
+                metrics.count("insurance_fallbacks_total", reason="api_error")
+                response = CONFIG["fallback_responses"]["api_error"]
+            return self._store_turn(session_id, message, response, country, language, insurance_type)
+
+    def chat_stream(self, session_id, message, country, language, insurance_type=None):
+        """Like chat(), but returns a ChatStream that yields the response while it is generated."""
+        trace = metrics.RequestTrace("chat_stream", session_id=session_id)
+        with trace.active():
+            insurance_type = insurance_type or self.assistant.determine_insurance_type(message, language)
+            history = self.history(session_id)
+
+        def finish(response):
+            if response is None:
+                metrics.count("insurance_fallbacks_total", reason="api_error")
+                response = CONFIG["fallback_responses"]["api_error"]
+            else:
+                response = self.assistant.format_response(response, insurance_type, country)
+            return self._store_turn(session_id, message, response, country, language, insurance_type)
+
+        chunks = self.llm.generate_response_stream(message, country, language, insurance_type, history,
+                                                 session_id=session_id)
+        return ChatStream(session_id, insurance_type, chunks, finish, trace)
+
+    def classify(self, messages, language=None, country=None):
+        """Classify messages (strings or dicts with "message"); see insurance_logic.classify_messages."""
+        return list(classify_messages(messages, language, country))
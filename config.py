@@ -1,8 +1,8 @@
 import os
-from dotenv import load_dotenv
+from bootstrap import load_environment
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from the .env file before CONFIG reads them
+load_environment()
 
 # Configuration settings
 CONFIG = {
@@ -30,12 +30,166 @@ CONFIG = {
         "India", "Canada", "United States", "United Kingdom", "Australia", 
         "Germany", "France", "Japan", "China", "Brazil"
     ],
+    # Keywords used to detect the insurance type of a message, per language.
+    # English keywords are always matched in addition to the selected language.
+    "insurance_keywords": {
+        "English": {
+            "auto": ["car", "vehicle", "auto", "automobile", "driving", "driver", "crash"],
+            "home": ["house", "home", "property", "apartment", "condo", "dwelling", "building"],
+            "health": ["health", "medical", "doctor", "hospital", "illness", "sick", "injury"],
+            "life": ["life", "death", "dying", "beneficiary", "dependent"],
+            "travel": ["travel", "trip", "vacation", "journey", "overseas", "abroad"],
+            "business": ["business", "company", "commercial", "liability", "professional"],
+            "liability": ["liability", "sued", "lawsuit", "legal", "responsibility"],
+            "pet": ["pet", "dog", "cat", "animal", "veterinarian", "vet"]
+        },
+        "French": {
+            "auto": ["voiture", "véhicule", "automobile", "conduire", "conducteur"],
+            "home": ["maison", "logement", "appartement", "habitation", "propriété"],
+            "health": ["santé", "médecin", "hôpital", "maladie", "malade"],
+            "life": ["vie", "décès", "bénéficiaire"],
+            "travel": ["voyage", "vacances", "étranger"],
+            "business": ["entreprise", "société", "commercial", "professionnel"],
+            "liability": ["responsabilité civile", "procès", "poursuite", "juridique"],
+            "pet": ["animal de compagnie", "chien", "chat", "vétérinaire"]
+        },
+        "Spanish": {
+            "auto": ["coche", "carro", "vehículo", "automóvil", "conducir", "conductor"],
+            "home": ["casa", "hogar", "vivienda", "apartamento", "propiedad"],
+            "health": ["salud", "médico", "hospital", "enfermedad", "enfermo"],
+            "life": ["vida", "muerte", "fallecimiento", "beneficiario"],
+            "travel": ["viaje", "vacaciones", "extranjero"],
+            "business": ["empresa", "negocio", "comercial", "profesional"],
+            "liability": ["responsabilidad civil", "demanda", "legal"],
+            "pet": ["mascota", "perro", "gato", "veterinario"]
+        },
+        "German": {
+            "auto": ["auto", "fahrzeug", "kfz", "fahrer", "unfall", "kfz-versicherung"],
+            "home": ["haus", "wohnung", "hausrat", "gebäude", "eigentum"],
+            "health": ["gesundheit", "krankenversicherung", "arzt", "krankenhaus", "krankheit"],
+            "life": ["leben", "lebensversicherung", "tod", "begünstigter"],
+            "travel": ["reise", "urlaub", "ausland"],
+            "business": ["unternehmen", "firma", "gewerbe", "betrieb"],
+            "liability": ["haftpflicht", "haftung", "klage"],
+            "pet": ["haustier", "hund", "katze", "tierarzt"]
+        },
+        "Portuguese": {
+            "auto": ["carro", "veículo", "automóvel", "dirigir", "motorista"],
+            "home": ["casa", "residência", "apartamento", "imóvel"],
+            "health": ["saúde", "médico", "hospital", "doença"],
+            "life": ["vida", "morte", "falecimento", "beneficiário"],
+            "travel": ["viagem", "férias", "exterior"],
+            "business": ["empresa", "negócio", "comercial", "profissional"],
+            "liability": ["responsabilidade civil", "processo", "jurídico"],
+            "pet": ["animal de estimação", "cachorro", "cão", "gato", "veterinário"]
+        },
+        "Hindi": {
+            "auto": ["गाड़ी", "कार", "वाहन", "ड्राइवर"],
+            "home": ["घर", "मकान", "संपत्ति"],
+            "health": ["स्वास्थ्य", "डॉक्टर", "अस्पताल", "बीमारी"],
+            "life": ["जीवन", "मृत्यु", "नामांकित"],
+            "travel": ["यात्रा", "विदेश"],
+            "business": ["व्यापार", "व्यवसाय", "कंपनी"],
+            "liability": ["दायित्व", "मुकदमा", "कानूनी"],
+            "pet": ["पालतू", "कुत्ता", "बिल्ली"]
+        }
+    },
+    # Regulations data, reloaded automatically when the file changes
+    "regulations_path": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "regulations.json"),
+    "regulations_reload_interval": 5,  # Seconds between checks for file changes
+    # Local retrieval over the insurance knowledge base (rebuild with `python retrieval.py`)
+    "retrieval_enabled": True,
+    "knowledge_path": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "knowledge.jsonl"),
+    "retrieval_index_dir": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "index"),
+    "retrieval_top_k": 3,                  # Passages added to the prompt
+    "retrieval_chunk_words": 120,          # Maximum words per indexed passage
+    "retrieval_chunk_overlap": 20,
+    "retrieval_type_boost": 1.25,          # Score multiplier for passages about the detected insurance type
+    "retrieval_answer_threshold": 0.8,     # FAQ match needed to answer without calling the model
+    # FAQ router in front of the model (exact, normalized and fuzzy question matching)
+    "faq_router_enabled": os.getenv("FAQ_ROUTER_ENABLED", "true").lower() == "true",
+    "faq_fuzzy_threshold": 0.75,   # Weighted token overlap needed to answer a fuzzy match
+    "faq_fuzzy_margin": 0.15,      # Lead over the next different answer needed to answer a fuzzy match
+    "faq_ambiguous_threshold": 0.4,  # Below this a query is a plain miss rather than an ambiguous match
+    # Prompt assembly
+    "prompt_token_budget": 1536,   # Estimated tokens allowed for the whole prompt
+    "prompt_recent_turns": 2,      # Chat turns included verbatim; older turns are summarized
+    "prompt_summary_tokens": 128,  # Tokens reserved for the summary of older turns
+    # Inference backends: "huggingface" (HTTP API), "mock" (local stand-in server) or "llamacpp" (local GGUF model)
+    "inference_backend": os.getenv("INFERENCE_BACKEND", "huggingface"),
+    "failover_backend": os.getenv("FAILOVER_BACKEND") or None,  # Used when the primary backend is unavailable
+    "api_base_url": "https://api-inference.huggingface.co/models",
+    "mock_server_url": os.getenv("MOCK_SERVER_URL", "http://127.0.0.1:8089"),
+    "local_model_path": os.getenv("LOCAL_MODEL_PATH", "models/open-insurance-llm-llama3-8b.Q4_K_M.gguf"),
+    "local_model_context": 4096,
+    "local_model_threads": os.cpu_count(),
+    # Micro-batching of concurrent generation calls to HTTP backends
+    "batching_enabled": os.getenv("BATCHING_ENABLED", "false").lower() == "true",
+    "batch_max_size": 8,          # Prompts per batched request
+    "batch_max_wait_ms": 20,      # How long the first prompt waits for others to join its batch
+    "batch_max_concurrency": 4,   # Batched requests in flight at once
     # API configuration
     "api_timeout": 60,  # Timeout in seconds
     "max_retries": 3,   # Number of retries if API fails
+    "request_deadline": 90,          # Overall seconds for one request, including retries and backoff
+    "retry_base_delay": 0.5,         # Backoff before the first retry (randomized, doubling per attempt)
+    "retry_max_delay": 8,            # Upper bound for a single backoff
+    "circuit_failure_threshold": 5,  # Consecutive failures that open the circuit
+    "circuit_reset_timeout": 30,     # Seconds the circuit stays open before a trial request
+    # HTTP connection pool configuration
+    "http_pool_connections": 10,    # Number of per-host pools to keep
+    "http_pool_maxsize": 20,        # Max pooled connections per host
+    "http_keep_alive": True,        # Reuse connections between requests
+    # Response cache configuration
+    "response_cache_backend": "memory",  # "memory", "sqlite" (shared across processes) or None to disable
+    "response_cache_max_entries": 2048,
+    "response_cache_ttl": 24 * 60 * 60,  # Seconds a cached response stays valid
+    "response_cache_path": "response_cache.sqlite3",
+    # Pre-generated insurance overviews (built with `python prewarm.py`)
+    "overviews_path": "overviews.json.gz",
+    # Rerun wall time is logged for every rerun; set SHOW_RERUN_TIMINGS=true to also show it in the sidebar
+    "show_rerun_timings": os.getenv("SHOW_RERUN_TIMINGS", "false").lower() == "true",
+    "rerun_timing_window": 50,  # Recent reruns kept per session
+    # Chat rendering: "native" (Streamlit chat elements) or "html" (styled HTML blocks)
+    "chat_render_mode": "native",
+    "chat_page_size": 20,  # Exchanges shown before older ones are paged out
+    # Conversation history: "memory" (lost on restart) or "sqlite" (append-only log, sessions can be resumed)
+    "conversation_store_backend": os.getenv("CONVERSATION_STORE", "sqlite"),
+    "conversation_store_path": "conversations.sqlite3",
+    "conversation_max_turns": 50,        # Turns kept in memory (and loaded on resume) per session
+    "conversation_max_sessions": 1000,   # Sessions kept in memory; others are reloaded from disk when used
+    "conversation_retention_days": 30,   # Stored turns older than this are pruned on startup
+    # HTTP API (python api.py); set CHAT_SERVICE_URL to make the Streamlit app a client of it
+    "api_host": "127.0.0.1",
+    "api_port": 8000,
+    "api_max_message_chars": 4000,
+    "api_max_classify_messages": 1000,
+    # Batch classification: a process pool is only started for inputs at least this long
+    "classify_parallel_min_messages": 5000,
+    "chat_service_url": os.getenv("CHAT_SERVICE_URL") or None,
+    # Metrics: Prometheus text format on http://metrics_host:metrics_port/metrics (0 disables the endpoint)
+    "metrics_host": "127.0.0.1",
+    "metrics_port": int(os.getenv("METRICS_PORT", "9108")),
+    "metrics_request_logs": os.getenv("METRICS_REQUEST_LOGS", "false").lower() == "true",  # One JSON log line per request
+    # Admission control for model calls: per-session and global rate limits, and a
+    # bounded queue that sheds requests which could not start within admission_max_wait
+    "admission_enabled": os.getenv("ADMISSION_ENABLED", "true").lower() == "true",
+    "admission_session_rpm": 10,       # Model calls per minute per session (0 disables the limit)
+    "admission_session_burst": 5,
+    "admission_global_rpm": 300,       # Model calls per minute for the whole process (0 disables the limit)
+    "admission_global_burst": 30,
+    "admission_max_concurrency": 8,    # Model calls running at once
+    "admission_max_queue": 32,         # Calls waiting for a slot
+    "admission_max_wait": 5,           # Seconds a call may wait for a slot
+    "admission_max_sessions": 10000,   # Session rate limits kept in memory
+    # Start-up: warm caches and upstream connections before a worker takes traffic
+    "preflight_enabled": os.getenv("PREFLIGHT", "true").lower() == "true",
+    "preflight_timeout": 10,  # Seconds allowed for opening each upstream connection
     "fallback_responses": {
         "api_error": "I'm having trouble connecting to my knowledge base. Please try again in a moment.",
         "timeout": "It's taking longer than expected to process your request. Please try a simpler question or try again later.",
-        "default": "I couldn't generate a proper response for your query. Could you please rephrase your question?"
+        "default": "I couldn't generate a proper response for your query. Could you please rephrase your question?",
+        "rate_limited": "You're sending messages faster than I can answer them. Please wait a few seconds and try again.",
+        "busy": "I'm answering a lot of questions right now. Please try again in a moment."
     }
 }
\ No newline at end of file
@@ -0,0 +1,269 @@
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+def _intern(value):
+    """Intern short metadata strings so thousands of turns share one copy of each."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Turn:
+    """
+    One exchange of a conversation.
+
+    Uses __slots__ to keep per-turn memory small, and supports turn["user"] and
+    turn.get("id") so it can be used wherever chat history dicts were expected.
+    """
+
+    __slots__ = ("id", "user", "assistant", "country", "language", "insurance_type", "created_at")
+
+    def __init__(self, id, user, assistant, country=None, language=None, insurance_type=None, created_at=None):
+        self.id = id
+        self.user = user
+        self.assistant = assistant
+        self.country = _intern(country)
+        self.language = _intern(language)
+        self.insurance_type = _intern(insurance_type)
+        self.created_at = created_at if created_at is not None else time.time()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Turn(id={self.id!r}, user={self.user[:30]!r})"
+
+
+class RetentionPolicy:
+    """How much conversation is kept: in memory per session, sessions in memory, and on disk."""
+
+    def __init__(self, max_turns=None, max_sessions=None, max_age_days=None):
+        self.max_turns = max_turns or CONFIG["conversation_max_turns"]
+        self.max_sessions = max_sessions or CONFIG["conversation_max_sessions"]
+        self.max_age_days = max_age_days if max_age_days is not None else CONFIG["conversation_retention_days"]
+
+
+class ConversationStore:
+    """
+    Keeps the recent turns of each session in memory.
+
+    Each session holds at most max_turns turns, and only the max_sessions most
+    recently used sessions stay in memory. Subclasses persist turns so sessions
+    evicted from memory, or lost to a restart, can be loaded again.
+    """
+
+    persistent = False
+
+    def __init__(self, retention=None):
+        self.retention = retention or RetentionPolicy()
+        self.evicted_sessions = 0
+        self._sessions = OrderedDict()  # session id -> deque of Turn
+        self._next_ids = {}             # session id -> id of the next turn
+        self._lock = threading.Lock()
+
+    def _session(self, session_id, refresh=False):
+        """
+        Return the in-memory turns of a session, loading them if needed (always with refresh).
+        Stored turns are read without holding the lock, so a slow read or a write in progress
+        doesn't hold up other sessions.
+        """
+        with self._lock:
+            turns = None if refresh else self._sessions.get(session_id)
+            if turns is not None:
+                self._sessions.move_to_end(session_id)
+                return turns
+
+        loaded = self._load(session_id, self.retention.max_turns)
+
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            # Another thread may have loaded the session meanwhile; a refresh replaces it
+            if turns is not None and not refresh:
+                self._sessions.move_to_end(session_id)
+                return turns
+            turns = self._sessions[session_id] = deque(loaded, maxlen=self.retention.max_turns)
+            self._sessions.move_to_end(session_id)
+            self._next_ids[session_id] = loaded[-1].id + 1 if loaded else 0
+            while len(self._sessions) > self.retention.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                del self._next_ids[evicted]
+                self.evicted_sessions += 1
+            return turns
+
+    def history(self, session_id, refresh=False):
+        """
+        Return the retained turns of a session, oldest first. With refresh, a persistent
+        store reloads the session first, to see turns added by other processes.
+        """
+        turns = self._session(session_id, refresh and self.persistent)
+        with self._lock:
+            return list(turns)
+
+    def append(self, session_id, user, assistant, country=None, language=None, insurance_type=None):
+        """Add a turn to a session and return it."""
+        turns = self._session(session_id)
+        with self._lock:
+            turn = Turn(self._next_ids.get(session_id, 0), user, assistant, country, language, insurance_type)
+            if session_id in self._next_ids:
+                self._next_ids[session_id] += 1
+        # A persistent store allocates the id, since other processes append to the same sessions
+        turn.id = self._persist(session_id, turn)
+        with self._lock:
+            # Unless the session was evicted or reloaded meanwhile
+            if self._sessions.get(session_id) is turns:
+                self._next_ids[session_id] = max(self._next_ids[session_id], turn.id + 1)
+                turns.append(turn)
+        return turn
+
+    def clear(self, session_id):
+        """Forget every turn of a session."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._next_ids.pop(session_id, None)
+        self._delete(session_id)
+
+    def _load(self, session_id, limit):
+        """Return up to limit most recent stored turns of a session, oldest first."""
+        return []
+
+    def _persist(self, session_id, turn):
+        """Store a new turn and return the id it was stored under."""
+        return turn.id
+
+    def _delete(self, session_id):
+        """Remove the stored turns of a session."""
+
+    def stats(self):
+        """Return memory usage counters."""
+        with self._lock:
+            return {
+                "sessions_in_memory": len(self._sessions),
+                "turns_in_memory": sum(len(turns) for turns in self._sessions.values()),
+                "evicted_sessions": self.evicted_sessions
+            }
+
+
+class MemoryConversationStore(ConversationStore):
+    """Store that keeps conversations in memory only; they are lost on restart or eviction."""
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Store with an append-only SQLite log of turns, so sessions can be resumed
+    after a restart. Turns older than the retention period are pruned on startup.
+    """
+
+    persistent = True
+
+    def __init__(self, path, retention=None):
+        super().__init__(retention)
+        self.path = path
+        self._local = threading.local()  # SQLite connections can't be shared across threads
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                "session_id TEXT NOT NULL, turn_id INTEGER NOT NULL, "
+                "user TEXT NOT NULL, assistant TEXT NOT NULL, "
+                "country TEXT, language TEXT, insurance_type TEXT, created_at REAL NOT NULL, "
+                "PRIMARY KEY (session_id, turn_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS turns_created ON turns (created_at)")
+        self.prune()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, session_id, limit):
+        try:
+            rows = self._connection().execute(
+                "SELECT turn_id, user, assistant, country, language, insurance_type, created_at "
+                "FROM turns WHERE session_id = ? ORDER BY turn_id DESC LIMIT ?",
+                (session_id, limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Conversation store read failed: {str(e)}")
+            return []
+        return [Turn(*row) for row in reversed(rows)]
+
+    def _persist(self, session_id, turn):
+        try:
+            with self._connection() as conn:
+                # The write lock is taken before reading the last id, so workers sharing
+                # the file never hand out the same one
+                conn.execute("BEGIN IMMEDIATE")
+                (turn_id,) = conn.execute(
+                    "SELECT COALESCE(MAX(turn_id) + 1, 0) FROM turns WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                conn.execute(
+                    "INSERT INTO turns "
+                    "(session_id, turn_id, user, assistant, country, language, insurance_type, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (session_id, turn_id, turn.user, turn.assistant,
+                     turn.country, turn.language, turn.insurance_type, turn.created_at)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Conversation store write failed: {str(e)}")
+            return turn.id
+        return turn_id
+
+    def _delete(self, session_id):
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+        except sqlite3.Error as e:
+            logger.error(f"Conversation store delete failed: {str(e)}")
+
+    def prune(self):
+        """Delete stored turns older than the retention period. Returns the number deleted."""
+        if not self.retention.max_age_days:
+            return 0
+        cutoff = time.time() - self.retention.max_age_days * 86400
+        with self._connection() as conn:
+            deleted = conn.execute("DELETE FROM turns WHERE created_at < ?", (cutoff,)).rowcount
+        if deleted:
+            logger.info(f"Pruned {deleted} conversation turns older than {self.retention.max_age_days} days")
+        return deleted
+
+
+# Process-wide store shared by every session
+_store = None
+_store_lock = threading.Lock()
+
+def create_conversation_store(backend=None):
+    """Create a conversation store for the given backend name ("memory" or "sqlite")."""
+    backend = backend or CONFIG["conversation_store_backend"]
+    if backend == "memory":
+        return MemoryConversationStore()
+    if backend == "sqlite":
+        return SQLiteConversationStore(os.path.abspath(CONFIG["conversation_store_path"]))
+    raise ValueError(f"Unknown conversation store backend: {backend}")
+
+def get_conversation_store():
+    """Return the process-wide conversation store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_conversation_store()
+                logger.info(f"Using {CONFIG['conversation_store_backend']} conversation store")
+    return _store
@@ -0,0 +1,249 @@
+import difflib
+import logging
+import math
+import sys
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional
+import bootstrap
+from config import CONFIG
+from regulations import get_regulations_store
+from retrieval import STOPWORDS, TOKEN_PATTERN, load_passages
+
+logger = logging.getLogger(__name__)
+
+# Words folded together before matching, so "compulsory" finds "mandatory"
+SYNONYMS = {
+    "compulsory": "mandatory",
+    "obligatory": "mandatory",
+    "required": "mandatory",
+    "requirement": "mandatory",
+    "rule": "regulation",
+    "law": "regulation",
+    "regulated": "regulation",
+    "covered": "cover",
+    "coverage": "cover",
+    "excess": "deductible",
+}
+
+# Questions answered by the regulations file, asked for each (country, insurance type) entry
+REGULATION_QUESTIONS = (
+    "Is {name} insurance mandatory?",
+    "Do I need {name} insurance?",
+    "What are the {name} insurance regulations?",
+    "What are the rules for {name} insurance?",
+    "How is {name} insurance regulated?"
+)
+
+COUNTRY_ALIASES = {"usa": "United States", "uk": "United Kingdom"}
+
+def _stem(token):
+    """Strip plural endings so "policies" and "policy" match."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+@dataclass
+class RouteDecision:
+    """Where a query goes: "exact", "normalized" or "fuzzy" carry a stored answer; "ambiguous" and "model" do not."""
+    route: str
+    answer: Optional[str] = None
+    entry_id: Optional[str] = None
+    score: float = 0.0
+
+
+class FAQRouter:
+    """
+    Matches queries against the stored FAQ and regulation answers in front of the model.
+
+    Every question is indexed at load three ways: its exact lowercase wording, a
+    normalized key (stopwords dropped, words stemmed, synonyms and insurance type
+    keywords folded, sorted) and its token set for a weighted overlap score. A query
+    is tried in that order; a fuzzy match only answers when it clearly beats the
+    next different answer, anything weaker goes to the model.
+    """
+
+    def __init__(self, passages):
+        self._type_tokens = {}
+        for insurance_type in CONFIG["insurance_types"]:
+            self._type_tokens[insurance_type] = f"type:{insurance_type}"
+        for insurance_type, keywords in CONFIG["insurance_keywords"]["English"].items():
+            for keyword in keywords:
+                self._type_tokens.setdefault(keyword, f"type:{insurance_type}")
+
+        self._countries = {(alias,): country for alias, country in COUNTRY_ALIASES.items()}
+        for country in CONFIG["countries"]:
+            self._countries[tuple(TOKEN_PATTERN.findall(country.lower()))] = country
+        self._longest_country = max(len(words) for words in self._countries)
+
+        self._entries = []
+        self._exact = defaultdict(list)       # lowercase wording -> entry ids
+        self._normalized = defaultdict(list)  # normalized key -> entry ids
+        self._postings = defaultdict(list)    # token -> entry ids
+
+        for passage in passages:
+            if passage["question"]:
+                self._add(passage, passage["question"])
+            elif passage["id"].startswith("regulation:") and passage["insurance_type"]:
+                for question in REGULATION_QUESTIONS:
+                    wording = question.format(name=passage["insurance_type"])
+                    self._add(passage, wording, exact_variants=(f"{wording[:-1]} in {passage['country']}",))
+
+        # Rarer tokens say more about which question was asked
+        total = len(self._entries)
+        self._weights = {token: math.log(1 + total / len(ids)) for token, ids in self._postings.items()}
+        self._unknown_weight = math.log(1 + total)
+        self._vocabulary = defaultdict(list)  # first letter -> tokens, for spelling correction
+        for token in self._postings:
+            if not token.startswith("type:"):
+                self._vocabulary[token[0]].append(token)
+
+        logger.info(f"FAQ router indexed {total} questions for {len({e['id'] for e in self._entries})} answers")
+
+    def _add(self, passage, question, exact_variants=()):
+        tokens, _ = self._normalize(question)
+        entry_id = len(self._entries)
+        self._entries.append({
+            "id": passage["id"],
+            "country": passage["country"],
+            "answer": passage["text"],
+            "tokens": tokens,
+            "types": {t for t in tokens if t.startswith("type:")} | (
+                {f"type:{passage['insurance_type']}"} if passage["insurance_type"] else set())
+        })
+        for wording in (question, *exact_variants):
+            self._exact[self._exact_key(wording)].append(entry_id)
+        self._normalized[" ".join(sorted(tokens))].append(entry_id)
+        for token in tokens:
+            self._postings[token].append(entry_id)
+
+    @staticmethod
+    def _exact_key(text):
+        return " ".join(TOKEN_PATTERN.findall(text.lower()))
+
+    def _normalize(self, text):
+        """Return (token set, countries mentioned) of a question with country names taken out."""
+        words = TOKEN_PATTERN.findall(text.lower())
+        countries = set()
+        tokens = set()
+        i = 0
+        while i < len(words):
+            for length in range(min(self._longest_country, len(words) - i), 0, -1):
+                country = self._countries.get(tuple(words[i:i + length]))
+                if country:
+                    countries.add(country)
+                    i += length
+                    break
+            else:
+                word = words[i]
+                i += 1
+                if word in STOPWORDS:
+                    continue
+                token = self._type_tokens.get(word)
+                if token is None:
+                    stem = _stem(word)
+                    token = self._type_tokens.get(stem) or SYNONYMS.get(stem, stem)
+                tokens.add(token)
+        return frozenset(tokens), countries
+
+    def _correct(self, token):
+        """Return the indexed token a misspelt one most likely meant, or the token itself."""
+        if token in self._weights or len(token) < 4:
+            return token
+        matches = difflib.get_close_matches(token, self._vocabulary.get(token[0], ()), n=1, cutoff=0.8)
+        return matches[0] if matches else token
+
+    def _pick(self, entry_ids, country):
+        """Return the entry for the country among entry_ids, preferring country-specific answers."""
+        fallback = None
+        for entry_id in entry_ids:
+            entry = self._entries[entry_id]
+            if entry["country"] == country:
+                return entry
+            if entry["country"] == "*" and fallback is None:
+                fallback = entry
+        return fallback
+
+    def route(self, query, country=None):
+        """Return the RouteDecision for a query asked with the selected country."""
+        entry = self._pick(self._exact.get(self._exact_key(query), ()), country)
+        if entry:
+            return RouteDecision("exact", entry["answer"], entry["id"], 1.0)
+
+        tokens, countries = self._normalize(query)
+        if len(countries) > 1:
+            # Comparisons between countries are not FAQ questions
+            return RouteDecision("model")
+        if countries:
+            country = next(iter(countries))
+        if not tokens:
+            return RouteDecision("model")
+
+        entry = self._pick(self._normalized.get(" ".join(sorted(tokens)), ()), country)
+        if entry:
+            return RouteDecision("normalized", entry["answer"], entry["id"], 1.0)
+
+        return self._fuzzy(frozenset(self._correct(t) for t in tokens), country)
+
+    def _fuzzy(self, tokens, country):
+        """Score candidate questions by idf-weighted Jaccard overlap and keep the best per answer."""
+        query_types = {t for t in tokens if t.startswith("type:")}
+        best = {}  # answer id -> (score, entry)
+        candidates = {entry_id for token in tokens for entry_id in self._postings.get(token, ())}
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if entry["country"] not in ("*", country):
+                continue
+            # A question about another insurance type is never the answer
+            if query_types and entry["types"] and not query_types & entry["types"]:
+                continue
+            shared = sum(self._weights[t] for t in tokens & entry["tokens"])
+            union = shared + sum(self._weights.get(t, self._unknown_weight) for t in tokens ^ entry["tokens"])
+            score = shared / union
+            if score > best.get(entry["id"], (0.0,))[0]:
+                best[entry["id"]] = (score, entry)
+
+        if not best:
+            return RouteDecision("model")
+        ranked = sorted(best.values(), key=lambda item: item[0], reverse=True)
+        score, entry = ranked[0]
+        runner_up = ranked[1][0] if len(ranked) > 1 else 0.0
+        if score >= CONFIG["faq_fuzzy_threshold"] and score - runner_up >= CONFIG["faq_fuzzy_margin"]:
+            return RouteDecision("fuzzy", entry["answer"], entry["id"], score)
+        if score >= CONFIG["faq_ambiguous_threshold"]:
+            return RouteDecision("ambiguous", entry_id=entry["id"], score=score)
+        return RouteDecision("model", score=score)
+
+
+# Process-wide router shared by every InsuranceLLM instance, and the regulations version it was built from
+_router = None
+_router_version = None
+_router_lock = threading.Lock()
+
+def get_faq_router():
+    """
+    Return the process-wide FAQ router, building it on first use and again whenever
+    the regulations are reloaded, so it never answers with replaced regulation text. None if disabled.
+    """
+    global _router, _router_version
+    if not CONFIG["faq_router_enabled"]:
+        return None
+    version, regulations = get_regulations_store().snapshot()
+    if _router is None or _router_version != version:
+        with _router_lock:
+            if _router is None or _router_version != version:
+                _router = FAQRouter(load_passages(CONFIG["knowledge_path"], regulations))
+                _router_version = version
+    return _router
+
+if __name__ == "__main__":
+    # python faq_router.py "is car insurance compulsory in India?"
+    bootstrap.init()
+    decision = get_faq_router().route(" ".join(sys.argv[1:]))
+    print(f"{decision.route} ({decision.score:.2f}) {decision.entry_id or ''}")
+    if decision.answer:
+        print(decision.answer)
@@ -0,0 +1,47 @@
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Process-wide pooled session shared by every InsuranceLLM instance
+_session = None
+_session_lock = threading.Lock()
+
+def create_session():
+    """Create a requests session with a keep-alive connection pool sized from CONFIG."""
+    session = requests.Session()
+    
+    # No adapter-level retries: InsuranceLLM handles retries and backoff itself
+    adapter = HTTPAdapter(
+        pool_connections=CONFIG["http_pool_connections"],
+        pool_maxsize=CONFIG["http_pool_maxsize"],
+        max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    
+    if not CONFIG["http_keep_alive"]:
+        session.headers["Connection"] = "close"
+    
+    return session
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                logger.info(f"Creating pooled HTTP session (pool size: {CONFIG['http_pool_maxsize']})")
+                _session = create_session()
+    return _session
+
+def close_session():
+    """Close the process-wide session and release its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
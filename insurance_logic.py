@@ -1,96 +1,229 @@
+import itertools
+import json
 import logging
-from typing import Dict, List, Optional
+import os
+import re
+import threading
+import unicodedata
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from config import CONFIG
+from regulations import get_regulations_store
+import metrics
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Prefix of the regulatory note that format_response appends to answers
+REGULATORY_NOTE_PREFIX = "\n\n**Regulatory Note**: "
+
+WORD_PATTERN = re.compile(r"\w+")
+# Splits text into [separator, word, separator, word, ..., separator]
+WORD_SPLIT = re.compile(r"(\w+)")
+
+
+class KeywordMatcher:
+    """
+    Scores insurance types against a message in a single pass over the text.
+    
+    The text is split into words once and each word (or run of words, for
+    multi-word keywords) is looked up in a table of keywords and their plural
+    "s"/"es" forms, so the cost grows with the text, not with the number of
+    keywords. Keywords that can't be matched as whole words (scripts where \\w
+    doesn't cover every letter, or without spaces between words) go through a
+    small regular expression instead.
+    """
+    
+    def __init__(self, keywords_by_type: Dict[str, List[str]]):
+        # Insurance types in configuration order, used to break ties
+        self.types = list(keywords_by_type)
+        
+        # A keyword may belong to several types; its weight is split between them
+        keyword_types: Dict[str, List[str]] = {}
+        for insurance_type, keywords in keywords_by_type.items():
+            for keyword in keywords:
+                types = keyword_types.setdefault(keyword.lower(), [])
+                if insurance_type not in types:
+                    types.append(insurance_type)
+        weights = {
+            keyword: tuple((insurance_type, 1.0 / len(types)) for insurance_type in types)
+            for keyword, types in keyword_types.items()
+        }
+        
+        groups: Dict[str, List[str]] = {"word": [], "prefix": [], "substring": []}
+        for keyword in keyword_types:
+            groups[self._boundary_kind(keyword)].append(keyword)
+        
+        # Plural forms first, so a keyword spelled like another one's plural wins;
+        # "s" after "es" so "cases" is "case" + "s" rather than "cas" + "es"
+        self._words: Dict[str, Tuple[Tuple[str, float], ...]] = {}
+        for suffix in ("es", "s", ""):
+            for keyword in groups["word"]:
+                self._words[keyword + suffix] = weights[keyword]
+        
+        # Words that start a multi-word keyword, and the lengths (in words) to try, longest first
+        self._phrase_starts = set()
+        lengths = set()
+        for keyword in groups["word"]:
+            words = WORD_PATTERN.findall(keyword)
+            if len(words) > 1:
+                self._phrase_starts.add(words[0])
+                lengths.add(len(words))
+        self._phrase_lengths = sorted(lengths, reverse=True)
+        
+        # Longest keywords first so they win over their prefixes
+        alternatives = []
+        if groups["prefix"]:
+            # Must start a word, but inflected endings are allowed
+            prefixes = sorted(groups["prefix"], key=len, reverse=True)
+            alternatives.append(rf"(?<!\S)({'|'.join(map(re.escape, prefixes))})")
+        if groups["substring"]:
+            substrings = sorted(groups["substring"], key=len, reverse=True)
+            alternatives.append(f"({'|'.join(map(re.escape, substrings))})")
+        self._pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        self._pattern_weights = {keyword: weights[keyword] for keyword in groups["prefix"] + groups["substring"]}
+    
+    def _word_matches(self, text: str) -> Iterable[Tuple[Tuple[str, float], ...]]:
+        """Return the weights of every keyword found as whole words in lowercase text."""
+        tokens = WORD_PATTERN.findall(text)
+        if self._phrase_starts.isdisjoint(tokens):
+            # Only single-word keywords can match: one lookup per word
+            return filter(None, map(self._words.get, tokens))
+        
+        # Words are at the odd positions of pieces, with the separators between them
+        pieces = WORD_SPLIT.split(text)
+        matches = []
+        i, end = 1, len(pieces)
+        while i < end:
+            matched = None
+            if pieces[i] in self._phrase_starts:
+                for length in self._phrase_lengths:
+                    stop = i + 2 * length - 1
+                    if stop <= end:
+                        matched = self._words.get("".join(pieces[i:stop]))
+                        if matched is not None:
+                            i = stop + 1
+                            break
+            if matched is None:
+                matched = self._words.get(pieces[i])
+                i += 2
+            if matched is not None:
+                matches.append(matched)
+        return matches
+    
+    @staticmethod
+    def _boundary_kind(keyword: str) -> str:
+        """Decide how a keyword is delimited, since \\w only covers some scripts fully."""
+        if any(unicodedata.east_asian_width(char) in ("W", "F") for char in keyword):
+            return "substring"  # Chinese/Japanese text has no spaces between words
+        if keyword[0].isalnum() and keyword[-1].isalnum() and all(char.isalnum() or char in " -'" for char in keyword):
+            return "word"
+        return "prefix"  # e.g. Devanagari vowel signs are not word characters
+    
+    def scores(self, message: str) -> Dict[str, float]:
+        """Return the keyword score of every insurance type found in the message."""
+        scores: Dict[str, float] = {}
+        text = message.lower()
+        for matched in self._word_matches(text):
+            for insurance_type, weight in matched:
+                scores[insurance_type] = scores.get(insurance_type, 0.0) + weight
+        
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                for insurance_type, weight in self._pattern_weights[match.group(match.lastindex)]:
+                    scores[insurance_type] = scores.get(insurance_type, 0.0) + weight
+        return scores
+    
+    def rank(self, message: str) -> List[Tuple[str, float]]:
+        """Return matching insurance types, best first, with a confidence between 0 and 1."""
+        scores = self.scores(message)
+        if not scores:
+            return []
+        total = sum(scores.values())
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.types.index(item[0])))
+        return [(insurance_type, score / total) for insurance_type, score in ranked]
+
+
+def _build_matcher(language: Optional[str]) -> KeywordMatcher:
+    """Build a matcher for English keywords plus those of the given language."""
+    keywords = CONFIG["insurance_keywords"]
+    merged = {insurance_type: list(words) for insurance_type, words in keywords["English"].items()}
+    for insurance_type, words in keywords.get(language, {}).items():
+        merged.setdefault(insurance_type, []).extend(words)
+    return KeywordMatcher(merged)
+
+# Matchers are compiled on first use, once per language, and shared by every InsuranceAssistant
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+def get_keyword_matcher(language: Optional[str] = None) -> KeywordMatcher:
+    """Return the compiled keyword matcher for a language (English if unknown)."""
+    if language not in CONFIG["insurance_keywords"]:
+        language = "English"
+    matcher = _matchers.get(language)
+    if matcher is None:
+        with _matchers_lock:
+            matcher = _matchers.get(language)
+            if matcher is None:
+                matcher = _matchers[language] = _build_matcher(language)
+    return matcher
+
+
 class InsuranceAssistant:
-    """Class that handles insurance-specific logic and processing."""
+    """
+    Class that handles insurance-specific logic and processing.
+    
+    The app shares one instance across all sessions and threads, so per-session
+    chat history lives in the conversation store (see conversation_store.py); the
+    history kept here is only for standalone use and is guarded by a lock.
+    """
     
     def __init__(self):
         self.chat_history = []
+        self._history_lock = threading.Lock()
         
     def add_to_history(self, user_message: str, assistant_response: str) -> None:
         """Add an exchange to the chat history."""
-        self.chat_history.append({
-            "user": user_message,
-            "assistant": assistant_response
-        })
-        # Keep history to reasonable size
-        if len(self.chat_history) > 10:
-            self.chat_history.pop(0)
+        with self._history_lock:
+            self.chat_history.append({
+                "user": user_message,
+                "assistant": assistant_response
+            })
+            # Keep history to reasonable size
+            if len(self.chat_history) > 10:
+                self.chat_history.pop(0)
     
     def get_history(self) -> List[Dict[str, str]]:
         """Return the current chat history."""
-        return self.chat_history
+        with self._history_lock:
+            return list(self.chat_history)
     
     def clear_history(self) -> None:
         """Clear the chat history."""
-        self.chat_history = []
+        with self._history_lock:
+            self.chat_history = []
     
-    def determine_insurance_type(self, message: str) -> Optional[str]:
+    def determine_insurance_type(self, message: str, language: Optional[str] = None) -> Optional[str]:
         """
         Analyze the user message to determine which insurance type they're asking about.
         Returns the insurance type or None if it can't be determined.
         """
-        message = message.lower()
-        
-        # Map of keywords to insurance types
-        insurance_keywords = {
-            "auto": ["car", "vehicle", "auto", "automobile", "driving", "driver", "crash"],
-            "home": ["house", "home", "property", "apartment", "condo", "dwelling", "building"],
-            "health": ["health", "medical", "doctor", "hospital", "illness", "sick", "injury"],
-            "life": ["life", "death", "dying", "beneficiary", "dependent"],
-            "travel": ["travel", "trip", "vacation", "journey", "overseas", "abroad"],
-            "business": ["business", "company", "commercial", "liability", "professional"],
-            "liability": ["liability", "sued", "lawsuit", "legal", "responsibility"],
-            "pet": ["pet", "dog", "cat", "animal", "veterinarian", "vet"]
-        }
-        
-        # Check for keywords in message
-        for insurance_type, keywords in insurance_keywords.items():
-            if any(keyword in message for keyword in keywords):
-                return insurance_type
-        
-        return None
+        with metrics.span("classify"):
+            ranked = self.rank_insurance_types(message, language)
+        return ranked[0][0] if ranked else None
+    
+    def rank_insurance_types(self, message: str, language: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Score every insurance type mentioned in the message.
+        Returns (insurance type, confidence) pairs, most likely first.
+        """
+        return get_keyword_matcher(language).rank(message)
     
     def get_relevant_regulations(self, insurance_type: str, country: str) -> str:
         """
         Return information about insurance regulations for the given type and country.
-        This is a placeholder - in production, this would connect to a database or API.
+        Regulations are loaded from CONFIG["regulations_path"] and picked up again when the file changes.
         """
-        # This is simplified mock data - in a real application, this would be more extensive
-        regulations = {
-            "Canada": {
-                "auto": "In Canada, auto insurance is regulated provincially. Each province has its own minimum coverage requirements.",
-                "home": "Home insurance is not legally required in Canada, but most mortgage lenders require it.",
-                "health": "Canada has a public health system (Medicare), but many Canadians also have private health insurance for services not covered.",
-                "life": "Life insurance in Canada is regulated by the Office of the Superintendent of Financial Institutions (OSFI).",
-                "default": "Insurance in Canada is regulated at both the federal and provincial levels."
-            },
-            "United States": {
-                "auto": "Auto insurance requirements vary by state in the US. Most states require liability insurance.",
-                "health": "Health insurance in the US is regulated under the Affordable Care Act, though requirements vary by state.",
-                "default": "Insurance in the US is primarily regulated at the state level."
-            },
-            "India": {
-                "auto": "In India, third-party auto insurance is mandatory under the Motor Vehicles Act.",
-                "home": "Home insurance is not mandatory in India, but is recommended especially in disaster-prone areas.",
-                "health": "India has both government health insurance schemes like Ayushman Bharat and private health insurance options.",
-                "life": "Life insurance in India is regulated by the Insurance Regulatory and Development Authority of India (IRDAI).",
-                "default": "Insurance in India is regulated by the Insurance Regulatory and Development Authority of India (IRDAI)."
-            },
-            "default": {
-                "default": "Insurance regulations vary by country and region."
-            }
-        }
-        
-        # Get country-specific regulations or default
-        country_regs = regulations.get(country, regulations["default"])
-        
-        # Get insurance-type specific regulations or default for the country
-        return country_regs.get(insurance_type, country_regs.get("default", regulations["default"]["default"]))
+        return get_regulations_store().get(insurance_type, country)
     
     def format_response(self, llm_response: str, insurance_type: Optional[str], country: str) -> str:
         """Format the final response to include relevant regulatory information if appropriate."""
@@ -98,7 +231,86 @@ class InsuranceAssistant:
         
         # Add regulatory information if we have an insurance type
         if insurance_type:
-            regulations = self.get_relevant_regulations(insurance_type, country)
-            formatted_response += f"\n\n**Regulatory Note**: {regulations}"
+            with metrics.span("format"):
+                regulations = self.get_relevant_regulations(insurance_type, country)
+            # Answers taken from the regulations file already contain the note
+            if regulations not in formatted_response:
+                formatted_response += f"{REGULATORY_NOTE_PREFIX}{regulations}"
         
-        return formatted_response
\ No newline at end of file
+        return formatted_response
+
+
+# Assistant used by the batch API (one per worker process)
+_batch_assistant = None
+
+def _classify_batch(batch: List[Tuple[Any, Any]], language: Optional[str], country: Optional[str]) -> List[Dict[str, Any]]:
+    """Classify a batch of (default id, record) pairs. Runs in worker processes, so it must be module-level."""
+    global _batch_assistant
+    if _batch_assistant is None:
+        _batch_assistant = InsuranceAssistant()
+    
+    results = []
+    for default_id, record in batch:
+        if isinstance(record, str):
+            record = {"message": record}
+        record_country = record.get("country") or country
+        ranked = _batch_assistant.rank_insurance_types(record["message"], record.get("language") or language)
+        insurance_type, confidence = ranked[0] if ranked else (None, 0.0)
+        
+        results.append({
+            "id": record.get("id", default_id),
+            "insurance_type": insurance_type,
+            "confidence": confidence,
+            "ranked": ranked,
+            # Same regulatory note format_response would append to the answer
+            "regulatory_note": _batch_assistant.get_relevant_regulations(insurance_type, record_country)
+            if insurance_type and record_country else None
+        })
+    return results
+
+def classify_messages(messages: Iterable[Any], language: Optional[str] = None, country: Optional[str] = None,
+                      processes: Optional[int] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Classify a stream of messages and yield one result per message, in input order.
+    Each message is a string or a dict with "message" and optional "id", "country" and "language".
+    Input is consumed lazily in batches, so memory stays constant however long the stream is.
+    With processes > 1 (at most one per CPU), batches are classified in a process pool with a
+    bounded number in flight. Inputs shorter than CONFIG["classify_parallel_min_messages"] are
+    classified in this process, since starting the pool and pickling batches costs more than it saves.
+    """
+    numbered = enumerate(messages)
+    batches = iter(lambda: list(itertools.islice(numbered, batch_size)), [])
+    processes = min(processes or 1, os.cpu_count() or 1)
+    
+    # Read far enough ahead to know whether the input is worth a pool
+    head = []
+    if processes > 1:
+        for batch in batches:
+            head.append(batch)
+            if sum(len(b) for b in head) >= CONFIG["classify_parallel_min_messages"]:
+                break
+        else:
+            processes = 1
+    batches = itertools.chain(head, batches)
+    
+    if processes <= 1:
+        for batch in batches:
+            yield from _classify_batch(batch, language, country)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor  # multiprocessing is only needed for parallel runs
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(_classify_batch, batch, language, country))
+            # Keep every worker busy without reading the whole input ahead
+            if len(pending) >= processes * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def classify_jsonl(path: str, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """Classify the messages in a JSONL file (one JSON object or string per line), streaming the file."""
+    with open(path, encoding="utf-8") as f:
+        records = (json.loads(line) for line in f if line.strip())
+        yield from classify_messages(records, **kwargs)
\ No newline at end of file
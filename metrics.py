@@ -0,0 +1,326 @@
+"""
+Request tracing and metrics.
+
+Stages of a request are timed with `span("stage")`, events are counted with
+`count(name)`, and sizes are recorded with `observe(name, value)`. A request is
+wrapped in `request_trace(kind)`, which can log one structured JSON line with the
+time spent per stage. Everything is exported in the Prometheus text format, together
+with the counters the cache, circuit breakers, single-flight, batching, admission
+queue and conversation store already keep, at http://127.0.0.1:9108/metrics (METRICS_PORT).
+"""
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as EventCounter, defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("insurance.requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (64, 128, 256, 512, 768, 1024, 1536, 2048, 4096)
+CHAR_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000)
+
+
+class Counter:
+    """A monotonically increasing count, per combination of label values."""
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """Observed values counted into cumulative buckets, per combination of label values."""
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            counts = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[len(self.buckets)] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        samples = []
+        for key, counts in values.items():
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, counts):
+                samples.append((f"{self.name}_bucket", dict(labels, le=repr(float(bound))), count))
+            samples.append((f"{self.name}_bucket", dict(labels, le="+Inf"), counts[len(self.buckets)]))
+            samples.append((f"{self.name}_sum", labels, counts[-1]))
+            samples.append((f"{self.name}_count", labels, counts[len(self.buckets)]))
+        return samples
+
+
+# Every metric the app records, declared in one place
+_metrics = {metric.name: metric for metric in (
+    Counter("insurance_requests_total", "Chat requests handled", ("kind",)),
+    Counter("insurance_fallbacks_total", "Responses replaced by fallback text", ("reason",)),
+    Counter("insurance_fast_path_total", "Answers served from the knowledge base without calling the model"),
+    Counter("insurance_route_total", "FAQ router decisions", ("route",)),
+    Counter("insurance_admission_total", "Admission decisions for model calls", ("outcome",)),
+    Counter("insurance_backend_errors_total", "Failed backend attempts", ("backend", "status")),
+    Counter("insurance_timeouts_total", "Backend attempts that timed out", ("backend",)),
+    Counter("insurance_model_loading_total", "503 responses while the model was loading", ("backend",)),
+    Histogram("insurance_stage_seconds", "Time spent in each stage of a request", ("stage",)),
+    Histogram("insurance_request_seconds", "End-to-end request time", ("kind",)),
+    Histogram("insurance_first_chunk_seconds", "Time until the first chunk of a streamed response"),
+    Histogram("insurance_admission_wait_seconds", "Time model calls waited in the admission queue"),
+    Histogram("insurance_rerun_seconds", "Wall time of Streamlit reruns"),
+    Histogram("insurance_prompt_tokens", "Estimated prompt size in tokens", buckets=TOKEN_BUCKETS),
+    Histogram("insurance_response_chars", "Response size in characters", buckets=CHAR_BUCKETS)
+)}
+
+_current_trace = contextvars.ContextVar("insurance_request_trace", default=None)
+
+
+class RequestTrace:
+    """Time per stage and event counts of one request, for the structured request log."""
+
+    def __init__(self, kind, **fields):
+        self.id = uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.fields = fields
+        self.stages = defaultdict(float)
+        self.events = EventCounter()
+        self.first_chunk = None
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def active(self):
+        """Make this the current trace, e.g. around each step of a generator consumed elsewhere."""
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    def mark_first_chunk(self):
+        if self.first_chunk is None:
+            self.first_chunk = time.perf_counter() - self.started
+            observe("insurance_first_chunk_seconds", self.first_chunk)
+
+    def finish(self, **fields):
+        """Record the request duration and write the structured log line if enabled."""
+        elapsed = time.perf_counter() - self.started
+        _metrics["insurance_requests_total"].inc(kind=self.kind)
+        _metrics["insurance_request_seconds"].observe(elapsed, kind=self.kind)
+        if CONFIG["metrics_request_logs"]:
+            record = {
+                "trace_id": self.id,
+                "kind": self.kind,
+                **self.fields,
+                **fields,
+                "duration_ms": round(elapsed * 1000, 1),
+                "first_chunk_ms": round(self.first_chunk * 1000, 1) if self.first_chunk is not None else None,
+                "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()},
+                "events": dict(self.events)
+            }
+            request_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+def current_trace():
+    """Return the trace of the request being handled, or None."""
+    return _current_trace.get()
+
+@contextmanager
+def request_trace(kind, **fields):
+    """Trace one request: the block's stages are collected and logged when it ends."""
+    trace = RequestTrace(kind, **fields)
+    with trace.active():
+        try:
+            yield trace
+        finally:
+            trace.finish()
+
+@contextmanager
+def span(stage):
+    """Time a stage of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _metrics["insurance_stage_seconds"].observe(elapsed, stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.stages[stage] += elapsed
+
+def count(name, amount=1, **labels):
+    """Increment a declared counter (and the current trace's event count)."""
+    _metrics[name].inc(amount, **labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.events[name.replace("insurance_", "").replace("_total", "")] += amount
+
+def observe(name, value, **labels):
+    """Record a value in a declared histogram."""
+    _metrics[name].observe(value, **labels)
+
+
+def _bridged_samples():
+    """
+    Yield (name, type, help, samples) for the counters other modules already keep.
+    Only modules that are loaded are reported, so scraping never creates caches or stores.
+    """
+    modules = sys.modules
+    if "response_cache" in modules and modules["response_cache"]._cache is not None:
+        stats = modules["response_cache"]._cache.stats()
+        yield "insurance_response_cache_lookups_total", "counter", "Response cache lookups", [
+            ("insurance_response_cache_lookups_total", {"result": "hit"}, stats["hits"]),
+            ("insurance_response_cache_lookups_total", {"result": "miss"}, stats["misses"])
+        ]
+        yield "insurance_response_cache_evictions_total", "counter", "Response cache evictions", [
+            ("insurance_response_cache_evictions_total", {}, stats["evictions"])
+        ]
+        yield "insurance_response_cache_entries", "gauge", "Responses in the cache", [
+            ("insurance_response_cache_entries", {}, stats["size"])
+        ]
+
+    if "resilience" in modules:
+        resilience = modules["resilience"]
+        events = resilience.event_counts()
+        yield "insurance_resilience_events_total", "counter", "Retries, backoff seconds, deadline stops and circuit rejections", [
+            ("insurance_resilience_events_total", {"event": event}, value) for event, value in events.items()
+        ]
+        states = []
+        for name, breaker in resilience.circuit_breakers().items():
+            stats = breaker.stats()
+            for state in (breaker.CLOSED, breaker.OPEN, breaker.HALF_OPEN):
+                states.append(("insurance_circuit_state", {"endpoint": name, "state": state}, int(stats["state"] == state)))
+        yield "insurance_circuit_state", "gauge", "Circuit breaker state per endpoint (1 for the current state)", states
+
+    if "model" in modules:
+        stats = modules["model"]._inflight_requests.stats()
+        yield "insurance_singleflight_calls_total", "counter", "Upstream calls executed or shared by single-flight", [
+            ("insurance_singleflight_calls_total", {"result": "executed"}, stats["executed"]),
+            ("insurance_singleflight_calls_total", {"result": "coalesced"}, stats["coalesced"])
+        ]
+        yield "insurance_singleflight_in_flight", "gauge", "Upstream calls in flight", [
+            ("insurance_singleflight_in_flight", {}, stats["in_flight"])
+        ]
+
+    if "batching" in modules:
+        batchers = list(modules["batching"]._batchers.items())
+        yield "insurance_batches_total", "counter", "Batched backend requests sent", [
+            ("insurance_batches_total", {"endpoint": endpoint}, batcher.stats()["batches_sent"])
+            for endpoint, batcher in batchers
+        ]
+        yield "insurance_batched_prompts_total", "counter", "Prompts sent in batched requests", [
+            ("insurance_batched_prompts_total", {"endpoint": endpoint}, batcher.stats()["requests_batched"])
+            for endpoint, batcher in batchers
+        ]
+
+    if "admission" in modules and modules["admission"]._controller is not None:
+        stats = modules["admission"]._controller.stats()
+        yield "insurance_admission_queue_depth", "gauge", "Model calls waiting in the admission queue", [
+            ("insurance_admission_queue_depth", {}, stats["queue_depth"])
+        ]
+        yield "insurance_admission_in_flight", "gauge", "Model calls holding an admission slot", [
+            ("insurance_admission_in_flight", {}, stats["in_flight"])
+        ]
+
+    if "conversation_store" in modules and modules["conversation_store"]._store is not None:
+        stats = modules["conversation_store"]._store.stats()
+        yield "insurance_conversation_sessions", "gauge", "Conversation sessions held in memory", [
+            ("insurance_conversation_sessions", {}, stats["sessions_in_memory"])
+        ]
+        yield "insurance_conversation_turns", "gauge", "Conversation turns held in memory", [
+            ("insurance_conversation_turns", {}, stats["turns_in_memory"])
+        ]
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def render_prometheus():
+    """Return all metrics in the Prometheus text exposition format."""
+    families = [(metric.name, metric.type, metric.help, metric.samples()) for metric in _metrics.values()]
+    families.extend(_bridged_samples())
+
+    lines = []
+    for name, metric_type, help, samples in families:
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for sample_name, labels, value in samples:
+            lines.append(f"{sample_name}{_format_labels(labels)} {float(value)!r}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics."""
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(host=None, port=None):
+    """Serve /metrics from a background thread, once per process. Returns the server, or None if disabled."""
+    global _server
+    port = port if port is not None else CONFIG["metrics_port"]
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host or CONFIG["metrics_host"], port), MetricsHandler)
+            except OSError as e:
+                # Another process (e.g. a second Streamlit worker) already serves this port
+                logger.warning(f"Metrics endpoint not started on port {port}: {str(e)}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(f"Serving metrics on http://{host or CONFIG['metrics_host']}:{port}/metrics")
+    return _server
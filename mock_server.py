@@ -0,0 +1,187 @@
+"""
+Deterministic stand-in for the Hugging Face inference API, for offline development and load tests.
+
+Usage:
+    python mock_server.py --port 8089 --latency-ms 200 --token-delay-ms 10 --error-rate 0.05
+
+Then run the app with INFERENCE_BACKEND=mock. Responses depend only on the prompt, and
+injected errors and latency come from a seeded random generator, so runs are reproducible.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bootstrap
+
+logger = logging.getLogger(__name__)
+
+SENTENCES = [
+    "Insurance protects you financially against unexpected losses.",
+    "Coverage, limits and exclusions differ between policies, so read the policy wording carefully.",
+    "A higher deductible usually lowers your premium.",
+    "Compare several insurers on price, coverage and claim settlement record.",
+    "Keep records and receipts, as they make claims faster to settle.",
+    "Local regulations may require a minimum level of cover.",
+    "Review your policy every year to make sure it still fits your needs.",
+    "An insurance adviser can help you choose the right level of protection."
+]
+
+
+class MockSettings:
+    """Latency and error injection settings shared by all request handlers."""
+    
+    def __init__(self, latency_ms=0, jitter_ms=0, token_delay_ms=0, error_rate=0.0, error_status=503,
+                 timeout_rate=0.0, timeout_s=120, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_delay_ms = token_delay_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.timeout_s = timeout_s
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def draw(self):
+        """Decide the fate of the next request: returns (latency in seconds, outcome)."""
+        with self._lock:
+            self.requests += 1
+            latency = (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+            roll = self._random.random()
+        if roll < self.timeout_rate:
+            return self.timeout_s, "timeout"
+        if roll < self.timeout_rate + self.error_rate:
+            return latency, "error"
+        return latency, "ok"
+
+
+def generate_text(prompt, max_new_tokens):
+    """Return a deterministic response for a prompt, roughly max_new_tokens words long."""
+    seed = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    words = []
+    while len(words) < min(max_new_tokens, 120):
+        words.extend(rng.choice(SENTENCES).split())
+    return " ".join(words[:max_new_tokens])
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Serves POST /models/<model_id> in the inference API's request and response format."""
+    
+    settings = MockSettings()
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+    
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "requests": self.settings.requests})
+        else:
+            self._send_json(404, {"error": "Not found"})
+    
+    def do_POST(self):
+        if not self.path.startswith("/models/"):
+            self._send_json(404, {"error": "Not found"})
+            return
+        
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._send_json(400, {"error": "Invalid JSON"})
+            return
+        
+        latency, outcome = self.settings.draw()
+        time.sleep(latency)
+        if outcome == "error":
+            self._send_json(self.settings.error_status, {"error": "Injected error"}, {"Retry-After": "1"})
+            return
+        if outcome == "timeout":
+            return  # The client gives up first; nothing is sent
+        
+        max_new_tokens = payload.get("parameters", {}).get("max_new_tokens", 512)
+        inputs = payload.get("inputs", "")
+        
+        if payload.get("stream") and isinstance(inputs, str):
+            self._stream(generate_text(inputs, max_new_tokens))
+        elif isinstance(inputs, list):
+            # Batched inputs get one result list per input
+            self._send_json(200, [[{"generated_text": generate_text(prompt, max_new_tokens)}] for prompt in inputs])
+        else:
+            self._send_json(200, [{"generated_text": generate_text(inputs, max_new_tokens)}])
+    
+    def _stream(self, text):
+        """Send the text as server-sent events, one word per token."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == 0 else f" {word}"
+            event = {"token": {"text": token, "special": False}, "generated_text": text if i == len(words) - 1 else None}
+            self._write_chunk(f"data:{json.dumps(event)}\n\n".encode("utf-8"))
+            time.sleep(self.settings.token_delay_ms / 1000)
+        self._write_chunk(b"")
+    
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def create_server(host="127.0.0.1", port=8089, **settings):
+    """Create a mock server; call serve_forever() on it (e.g. in a thread for tests)."""
+    handler = type("ConfiguredMockHandler", (MockHandler,), {"settings": MockSettings(**settings)})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the inference API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Base latency before responding")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra latency")
+    parser.add_argument("--token-delay-ms", type=float, default=0, help="Delay between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code of injected errors")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that never answer")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency and error injection")
+    args = parser.parse_args()
+    bootstrap.init()
+    
+    server = create_server(
+        args.host, args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        token_delay_ms=args.token_delay_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        timeout_rate=args.timeout_rate,
+        seed=args.seed
+    )
+    logger.info(f"Mock inference server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,83 @@
-import requests
-import json
-import time
+from contextlib import nullcontext
 from config import CONFIG
+from admission import PRIORITY_CHAT, PRIORITY_OVERVIEW, AdmissionRejected, get_admission_controller
+from backends import BackendError, BackendTimeout, LlamaCppBackend, create_backend
+from batching import get_batching_backend
+from response_cache import get_response_cache, make_cache_key
+from singleflight import SingleFlight
+from prompt_builder import PromptBuilder
+from resilience import Deadline, RetryPolicy, get_circuit_breaker
+import metrics
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Concurrent identical prompts from any session share one upstream request
+_inflight_requests = SingleFlight()
+
+# Basic responses for different insurance types, used when the API fails
+FALLBACK_TEMPLATES = {
+    "auto": "Auto insurance in {country} typically covers liability for accidents, damage to your vehicle, and medical expenses. Policies can include collision, comprehensive, and personal injury protection.",
+    "home": "Home insurance in {country} usually covers damage to your property from events like fire, theft, and certain natural disasters. It often includes liability coverage for accidents on your property.",
+    "health": "Health insurance in {country} helps cover medical expenses like doctor visits, hospital stays, and prescription medications. Coverage types and costs vary based on the specific plan.",
+    "life": "Life insurance in {country} provides financial protection for your beneficiaries after your death. Policies can be term (for a specific period) or permanent (for your entire life).",
+    "travel": "Travel insurance in {country} typically covers trip cancellations, medical emergencies abroad, lost luggage, and other travel-related issues. Costs vary based on destination and coverage level.",
+    "business": "Business insurance in {country} protects companies from various risks including property damage, liability claims, and business interruption. Coverage needs vary by industry and company size.",
+    "liability": "Liability insurance in {country} covers costs if you're legally responsible for damages or injuries to others. It's important for both individuals and businesses to protect their assets.",
+    "pet": "Pet insurance in {country} helps cover veterinary expenses for illness or injury to your pet. Plans vary in coverage and cost based on your pet's age, breed, and existing conditions."
+}
+
+class InferenceError(Exception):
+    """Raised when the inference API fails to produce a response."""
+
+
+class InferenceTimeout(InferenceError):
+    """Raised when the final attempt against the inference API timed out."""
+
+
+class EmptyResponseError(InferenceError):
+    """Raised when the inference API answers successfully but without generated text."""
+
+
+class ServiceUnavailableError(InferenceError):
+    """Raised without calling a backend while the circuit breaker for its endpoint is open."""
+
+
 class InsuranceLLM:
-    """Class to interact with the Hugging Face LLM model for insurance assistance."""
+    """Class to interact with the insurance LLM through the configured inference backend."""
     
-    def __init__(self):
-        self.api_key = CONFIG["huggingface_api_key"]
+    def __init__(self, session=None, cache=None, backend=None, admission=None):
         self.model_id = CONFIG["model_id"]
-        self.api_url = f"https://api-inference.huggingface.co/models/{self.model_id}"
-        self.headers = {"Authorization": f"Bearer {self.api_key}"}
         self.timeout = CONFIG["api_timeout"]
         self.max_retries = CONFIG["max_retries"]
+        # Primary backend, plus an optional backend to fail over to when it is unavailable.
+        # HTTP backends use the process-wide pooled session unless one is given.
+        self.backend = backend or create_backend(CONFIG["inference_backend"], session)
+        self.backends = [self.backend]
+        if CONFIG["failover_backend"] and CONFIG["failover_backend"] != self.backend.name:
+            self.backends.append(create_backend(CONFIG["failover_backend"], session))
+        if CONFIG["batching_enabled"]:
+            # Concurrent calls to an HTTP backend are merged into batched requests
+            self.backends = [
+                b if isinstance(b, LlamaCppBackend) else get_batching_backend(b)
+                for b in self.backends
+            ]
+            self.backend = self.backends[0]
+        # Shared response cache (None when caching is disabled)
+        self.cache = cache if cache is not None else get_response_cache()
+        # Shared rate limits and queue for model calls (None when admission control is disabled)
+        self.admission = admission if admission is not None else get_admission_controller()
+        self.prompt_builder = PromptBuilder()
+        # Backoff between attempts; circuit breakers are shared per backend endpoint
+        self.retry_policy = RetryPolicy()
+        self.generation_parameters = {
+            "max_new_tokens": 512,
+            "temperature": 0.7,
+            "top_p": 0.95,
+            "do_sample": True
+        }
         
-    def _prepare_prompt(self, query, country, language, insurance_type=None):
+    def _prepare_prompt(self, query, country, language, insurance_type=None, passages=None):
         """Prepare a prompt for the LLM based on user inputs."""
         
         # Format the query with context
@@ -31,110 +89,420 @@ Respond in {language}.
         if insurance_type:
             base_prompt += f"Focus on {insurance_type} insurance.\n\n"
         
+        # Ground the answer in passages from the local knowledge base
+        if passages:
+            base_prompt += "Use the following information where relevant:\n"
+            for passage in passages:
+                base_prompt += f"- {passage['text']}\n"
+            base_prompt += "\n"
+        
         base_prompt += f"User query: {query}\n\nRespond with helpful, accurate information about insurance:"
         
         return base_prompt
     
-    def generate_response(self, query, country, language, insurance_type=None, chat_history=None):
-        """Generate a response from the LLM for an insurance query."""
+    def _retrieve_passages(self, query, country, insurance_type=None):
+        """Return the knowledge base passages most relevant to a query."""
+        retrieval = self.retrieval
+        if retrieval is None:
+            return []
+        with metrics.span("retrieval"):
+            return retrieval.search(
+                query,
+                country,
+                insurance_type.lower() if insurance_type else None,
+                top_k=CONFIG["retrieval_top_k"]
+            )
+    
+    def load_knowledge(self):
+        """Load the retrieval index and the FAQ router, so the first request doesn't pay for it."""
+        return self.retrieval, self.faq_router
+    
+    @property
+    def retrieval(self):
+        """
+        Local knowledge index used to ground prompts (None when retrieval is disabled).
+        Looked up on every use, since it is rebuilt when the regulations change; NumPy is
+        only imported from here.
+        """
+        from retrieval import get_retrieval_index
+        return get_retrieval_index()
+    
+    @property
+    def faq_router(self):
+        """FAQ router answering FAQ-style queries before the model (None when disabled)."""
+        from faq_router import get_faq_router
+        return get_faq_router()
+    
+    def connect(self):
+        """Open a connection to (or load the model of) every backend, so the first request doesn't pay for it."""
+        for backend in self.backends:
+            try:
+                backend.warm_up(CONFIG["preflight_timeout"])
+            except BackendError as e:
+                logger.warning(f"Could not warm up backend '{backend.name}': {str(e)}")
+    
+    def _answer_from_retrieval(self, query, country, language, insurance_type=None):
+        """
+        Return a stored answer if the query closely matches a knowledge base FAQ, else None.
+        Stored answers are in English, so other languages always go to the model.
+        """
+        retrieval = self.retrieval if language == "English" else None
+        if retrieval is None:
+            return None
+        with metrics.span("retrieval"):
+            return retrieval.answer(query, country, insurance_type.lower() if insurance_type else None)
+    
+    def _answer_locally(self, query, country, language, insurance_type=None):
+        """
+        Route a query: return a stored answer when the FAQ router or the knowledge base
+        matches it confidently, else None so it goes to the model. Each decision is counted.
+        """
+        route, answer = "model", None
+        router = self.faq_router if language == "English" else None
+        if router is not None:
+            with metrics.span("route"):
+                decision = router.route(query, country)
+            route, answer = decision.route, decision.answer
+        if answer is None:
+            answer = self._answer_from_retrieval(query, country, language, insurance_type)
+            if answer is not None:
+                route = "retrieval"
+        
+        metrics.count("insurance_route_total", route=route)
+        if answer is not None:
+            logger.info(f"Answering from the knowledge base without calling the model ({route} match)")
+            metrics.count("insurance_fast_path_total")
+        return answer
+    
+    def _build_prompt(self, query, country, language, insurance_type=None, chat_history=None):
+        """Build the full prompt, with retrieved passages and chat history fitted into the token budget."""
+        passages = self._retrieve_passages(query, country, insurance_type)
+        with metrics.span("prompt"):
+            built = self.prompt_builder.build(
+                lambda selected: self._prepare_prompt(query, country, language, insurance_type, selected),
+                passages,
+                chat_history
+            )
+        metrics.observe("insurance_prompt_tokens", built.tokens)
+        logger.info(
+            f"Prompt size: {built.tokens} tokens (base {built.sections['base']}, "
+            f"history {built.sections['history']}, summary {built.sections['summary']}, "
+            f"{built.passages}/{len(passages)} passages)"
+        )
+        return built.text
+    
+    def generate_response(self, query, country, language, insurance_type=None, chat_history=None,
+                          session_id=None, priority=PRIORITY_CHAT):
+        """
+        Generate a response from the LLM for an insurance query. Calls that reach the
+        model go through admission control for the session; a rejected call gets a
+        fallback response right away.
+        """
+        
+        answer = self._answer_locally(query, country, language, insurance_type)
+        if answer is not None:
+            return answer
+        
+        prompt = self._build_prompt(query, country, language, insurance_type, chat_history)
+        
+        cached = self._get_cached(prompt)
+        if cached is not None:
+            return cached
+        
+        # Every caller is held to its own session's rate, including those that join a call in flight
+        try:
+            session_bucket = self.admission.check_session(session_id) if self.admission is not None else None
+        except AdmissionRejected as e:
+            return self._fallback_for_rejection(e)
+        
+        try:
+            return _inflight_requests.do(self._cache_key(prompt), self._admitted_request, prompt, session_id, priority)
+        except AdmissionRejected as e:
+            # A shed request does not use up the session's rate budget
+            if session_bucket is not None:
+                session_bucket.refund()
+            return self._fallback_for_rejection(e)
+        except InferenceError as e:
+            return self._fallback_for_error(e, query, country, insurance_type)
+    
+    def _admit(self, session_id, priority, session_checked=False):
+        """Return the context that holds an admission slot for one model call."""
+        if self.admission is None:
+            return nullcontext()
+        return self.admission.admit(session_id, priority, session_checked)
+    
+    def _admitted_request(self, prompt, session_id, priority):
+        """
+        Take the global rate token and a slot for the upstream call of a prompt. Callers
+        that join it in flight share the slot; their session rate was checked already.
+        """
+        with self._admit(session_id, priority, session_checked=True):
+            return self._request_text(prompt)
+    
+    def generate_text(self, prompt):
+        """
+        Generate text for a fully built prompt, retrying on failure.
+        Raises InferenceError (or a subclass) instead of returning fallback text.
+        """
+        
+        cached = self._get_cached(prompt)
+        if cached is not None:
+            return cached
+        
+        return _inflight_requests.do(self._cache_key(prompt), self._request_text, prompt)
+    
+    def _request_text(self, prompt):
+        """Generate text with the primary backend, failing over to the next one, and cache the result."""
+        error = InferenceError("No inference backend configured")
+        for backend in self.backends:
+            try:
+                text = self._request_from_backend(backend, prompt)
+            except EmptyResponseError:
+                raise
+            except InferenceError as e:
+                logger.warning(f"Backend '{backend.name}' failed: {str(e)}")
+                error = e
+                continue
+            self._set_cached(prompt, text)
+            return text
+        raise error
+    
+    def _request_from_backend(self, backend, prompt):
+        """Call one backend for a prompt with retries, backoff and its circuit breaker."""
+        breaker = get_circuit_breaker(backend.endpoint)
+        deadline = Deadline(CONFIG["request_deadline"])
+        error = InferenceError("No attempt was made")
         
         for attempt in range(self.max_retries):
+            # Fail fast while the endpoint is known to be down
+            if not breaker.allow_request():
+                raise ServiceUnavailableError(f"Circuit open for {backend.endpoint}")
+            
+            retry_after = None
             try:
-                prompt = self._prepare_prompt(query, country, language, insurance_type)
-                
-                # Add chat history context if available
-                if chat_history and len(chat_history) > 0:
-                    context = "Previous conversation:\n"
-                    for entry in chat_history[-3:]:  # Include last 3 exchanges for context
-                        context += f"User: {entry['user']}\nAssistant: {entry['assistant']}\n"
-                    prompt = context + "\n\n" + prompt
-                
-                payload = {
-                    "inputs": prompt,
-                    "parameters": {
-                        "max_new_tokens": 512,
-                        "temperature": 0.7,
-                        "top_p": 0.95,
-                        "do_sample": True
-                    },
-                    "options": {
-                        "wait_for_model": True  # This tells the API to wait if model is loading
-                    }
-                }
-                
-                logger.info(f"Sending request to HuggingFace API for model: {self.model_id} (Attempt {attempt+1}/{self.max_retries})")
-                response = requests.post(self.api_url, headers=self.headers, json=payload, timeout=self.timeout)
-                
-                # Handle different response status codes
-                if response.status_code == 200:
-                    result = response.json()
-                    # Extract the generated text from the response
-                    if isinstance(result, list) and len(result) > 0:
-                        generated_text = result[0].get("generated_text", "")
-                        # Clean up response - remove the prompt part if it's included
-                        if generated_text.startswith(prompt):
-                            generated_text = generated_text[len(prompt):].strip()
-                        return generated_text
-                    return CONFIG["fallback_responses"]["default"]
-                
-                elif response.status_code == 503:
-                    # Model is still loading, wait and retry
-                    logger.warning(f"Model still loading. Waiting before retry. Status: {response.status_code}")
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    continue
-                    
-                else:
-                    logger.error(f"API error: {response.status_code} - {response.text}")
-                    
-                    # If this is the last retry, return a fallback response
-                    if attempt == self.max_retries - 1:
-                        return self._generate_fallback_response(query, country, insurance_type)
-                    
-                    # Otherwise wait and retry
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    
-            except requests.exceptions.Timeout:
+                logger.info(f"Generating with backend '{backend.name}' (Attempt {attempt+1}/{self.max_retries})")
+                with metrics.span("inference"):
+                    generated_text = backend.generate(prompt, self.generation_parameters, deadline.attempt_timeout(self.timeout))
+                breaker.record_success()
+                if not generated_text:
+                    raise EmptyResponseError("Backend returned no generated text")
+                return generated_text
+            
+            except BackendTimeout as e:
                 logger.error("Request timed out")
-                time.sleep(2 ** attempt)  # Exponential backoff
-                if attempt == self.max_retries - 1:
-                    return CONFIG["fallback_responses"]["timeout"]
-                
-            except Exception as e:
+                metrics.count("insurance_timeouts_total", backend=backend.name)
+                if not e.shared:
+                    breaker.record_failure()
+                error = InferenceTimeout("Request timed out")
+            
+            except BackendError as e:
                 logger.error(f"Error generating response: {str(e)}")
-                if attempt == self.max_retries - 1:
-                    return self._generate_fallback_response(query, country, insurance_type)
-                time.sleep(2 ** attempt)  # Exponential backoff
-                
-        # If we've exhausted all retries
+                self._count_backend_error(backend, e)
+                error = InferenceError(str(e))
+                if not e.retryable:
+                    # Retrying won't help, but it says nothing about the endpoint's health
+                    raise error from e
+                # One failed batch request is one failure, however many callers shared it
+                if not e.shared:
+                    breaker.record_failure()
+                retry_after = e.retry_after
+            
+            finally:
+                # A trial that ended without an outcome must not block every later request
+                breaker.release_trial()
+            
+            # Back off before the next attempt unless this was the last one or time is up
+            if attempt == self.max_retries - 1:
+                break
+            with metrics.span("backoff"):
+                if not self.retry_policy.wait(attempt, deadline, retry_after):
+                    break
+        
+        raise error
+    
+    def generate_response_stream(self, query, country, language, insurance_type=None, chat_history=None,
+                                 session_id=None, priority=PRIORITY_CHAT):
+        """
+        Generate a response from the LLM, yielding text chunks as they arrive.
+        Uses the same admission, retry and fallback behaviour as generate_response. If a
+        stream breaks midway, the retry resumes generation after the text already yielded.
+        """
+        
+        answer = self._answer_locally(query, country, language, insurance_type)
+        if answer is not None:
+            yield answer
+            return
+        
+        prompt = self._build_prompt(query, country, language, insurance_type, chat_history)
+        
+        cached = self._get_cached(prompt)
+        if cached is not None:
+            yield cached
+            return
+        
+        try:
+            # The slot is held until the stream ends or is abandoned
+            with self._admit(session_id, priority):
+                yield from self._stream_with_failover(prompt, query, country, insurance_type)
+        except AdmissionRejected as e:
+            yield self._fallback_for_rejection(e)
+    
+    def _stream_with_failover(self, prompt, query, country, insurance_type=None):
+        """Stream from the primary backend, failing over to the next one, and cache the result."""
+        generated = ""
+        error = InferenceError("No inference backend configured")
+        
+        for backend in self.backends:
+            try:
+                for chunk in self._stream_from_backend(backend, prompt, generated):
+                    generated += chunk
+                    yield chunk
+            except InferenceError as e:
+                logger.warning(f"Backend '{backend.name}' failed: {str(e)}")
+                error = e
+                continue
+            
+            if not generated:
+                metrics.count("insurance_fallbacks_total", reason="empty")
+                yield CONFIG["fallback_responses"]["default"]
+            else:
+                self._set_cached(prompt, generated)
+            return
+        
+        # If every backend failed, only fall back when nothing was shown yet
+        if not generated:
+            yield self._fallback_for_error(error, query, country, insurance_type)
+        else:
+            logger.warning("Stream ended early after exhausting retries; returning partial response")
+    
+    def _stream_from_backend(self, backend, prompt, generated=""):
+        """
+        Stream from one backend with retries, backoff and its circuit breaker.
+        A retry resumes after the text already generated. Raises InferenceError when all attempts fail.
+        """
+        breaker = get_circuit_breaker(backend.endpoint)
+        deadline = Deadline(CONFIG["request_deadline"])
+        error = InferenceError("No attempt was made")
+        
+        for attempt in range(self.max_retries):
+            # Fail fast while the endpoint is known to be down
+            if not breaker.allow_request():
+                raise ServiceUnavailableError(f"Circuit open for {backend.endpoint}")
+            
+            retry_after = None
+            try:
+                logger.info(f"Streaming with backend '{backend.name}' (Attempt {attempt+1}/{self.max_retries})")
+                # Continue from the partial output if a previous stream broke
+                first_chunk = True
+                with metrics.span("inference"):
+                    for chunk in backend.stream(prompt + generated, self.generation_parameters, deadline.attempt_timeout(self.timeout)):
+                        if first_chunk:
+                            breaker.record_success()
+                            first_chunk = False
+                        generated += chunk
+                        yield chunk
+                if first_chunk:
+                    breaker.record_success()
+                return
+            
+            except BackendTimeout:
+                logger.error("Stream timed out")
+                metrics.count("insurance_timeouts_total", backend=backend.name)
+                breaker.record_failure()
+                error = InferenceTimeout("Stream timed out")
+            
+            except BackendError as e:
+                logger.error(f"Error streaming response: {str(e)}")
+                self._count_backend_error(backend, e)
+                error = InferenceError(str(e))
+                if not e.retryable:
+                    # Retrying won't help, but it says nothing about the endpoint's health
+                    raise error from e
+                breaker.record_failure()
+                retry_after = e.retry_after
+            
+            finally:
+                # A trial that ended without an outcome (or a stream the caller abandoned) is released
+                breaker.release_trial()
+            
+            # Back off before the next attempt unless this was the last one or time is up
+            if attempt == self.max_retries - 1:
+                break
+            with metrics.span("backoff"):
+                if not self.retry_policy.wait(attempt, deadline, retry_after):
+                    break
+        
+        raise error
+    
+    def _fallback_for_error(self, error, query, country, insurance_type=None):
+        """Return the fallback text for a failed generation."""
+        if isinstance(error, InferenceTimeout):
+            metrics.count("insurance_fallbacks_total", reason="timeout")
+            return CONFIG["fallback_responses"]["timeout"]
+        if isinstance(error, EmptyResponseError):
+            metrics.count("insurance_fallbacks_total", reason="empty")
+            return CONFIG["fallback_responses"]["default"]
+        metrics.count("insurance_fallbacks_total", reason="unavailable" if isinstance(error, ServiceUnavailableError) else "error")
         return self._generate_fallback_response(query, country, insurance_type)
     
+    def _fallback_for_rejection(self, rejection):
+        """Return the fallback text for a model call that admission control turned away."""
+        metrics.count("insurance_fallbacks_total", reason=rejection.reason)
+        return CONFIG["fallback_responses"]["rate_limited" if rejection.reason == "session_rate" else "busy"]
+    
+    def _count_backend_error(self, backend, error):
+        """Count a failed backend attempt, and separately the 503s of a model that is still loading."""
+        metrics.count("insurance_backend_errors_total", backend=backend.name, status=error.status_code or "none")
+        if error.status_code == 503:
+            metrics.count("insurance_model_loading_total", backend=backend.name)
+    
+    def _cache_key(self, prompt):
+        """Return the response cache key for a prompt and the generation parameters."""
+        return make_cache_key(f"{self.backend.name}:{self.model_id}", prompt, self.generation_parameters)
+    
+    def _get_cached(self, prompt):
+        """Return a cached response for the prompt, or None."""
+        if self.cache is None:
+            return None
+        with metrics.span("cache"):
+            cached = self.cache.get(self._cache_key(prompt))
+        if cached is not None:
+            logger.info("Serving response from cache")
+        return cached
+    
+    def _set_cached(self, prompt, response):
+        """Cache a successfully generated response. Fallback responses are never cached."""
+        if self.cache is not None and response:
+            self.cache.set(self._cache_key(prompt), response)
+    
     def _generate_fallback_response(self, query, country, insurance_type=None):
         """Generate a fallback response when the API fails."""
         # This is a simple fallback mechanism when the API is unavailable
-        
-        # Basic responses for different insurance types
-        basic_responses = {
-            "auto": f"Auto insurance in {country} typically covers liability for accidents, damage to your vehicle, and medical expenses. Policies can include collision, comprehensive, and personal injury protection.",
-            "home": f"Home insurance in {country} usually covers damage to your property from events like fire, theft, and certain natural disasters. It often includes liability coverage for accidents on your property.",
-            "health": f"Health insurance in {country} helps cover medical expenses like doctor visits, hospital stays, and prescription medications. Coverage types and costs vary based on the specific plan.",
-            "life": f"Life insurance in {country} provides financial protection for your beneficiaries after your death. Policies can be term (for a specific period) or permanent (for your entire life).",
-            "travel": f"Travel insurance in {country} typically covers trip cancellations, medical emergencies abroad, lost luggage, and other travel-related issues. Costs vary based on destination and coverage level.",
-            "business": f"Business insurance in {country} protects companies from various risks including property damage, liability claims, and business interruption. Coverage needs vary by industry and company size.",
-            "liability": f"Liability insurance in {country} covers costs if you're legally responsible for damages or injuries to others. It's important for both individuals and businesses to protect their assets.",
-            "pet": f"Pet insurance in {country} helps cover veterinary expenses for illness or injury to your pet. Plans vary in coverage and cost based on your pet's age, breed, and existing conditions."
-        }
-        
-        if insurance_type and insurance_type in basic_responses:
-            return basic_responses[insurance_type]
+        if insurance_type and insurance_type in FALLBACK_TEMPLATES:
+            return FALLBACK_TEMPLATES[insurance_type].format(country=country)
         
         # If no specific insurance type or not found in our mappings
         return f"Insurance in {country} offers protection against various risks, from health problems to property damage. Different policies cover different needs. To get specific advice, consider what you want to protect and consult with insurance professionals."
 
-    def get_insurance_info(self, insurance_type, country, language):
-        """Get general information about a specific insurance type."""
-        prompt = f"""
+    def _insurance_info_query(self, insurance_type, country, language):
+        """Return the query used to request an overview of an insurance type."""
+        return f"""
 Provide a brief overview of {insurance_type} insurance in {country}.
 Include key coverage details, typical costs, and important considerations.
 Respond in {language}.
 """
-        return self.generate_response(prompt, country, language, insurance_type)
\ No newline at end of file
+    
+    def insurance_info_prompt(self, insurance_type, country, language):
+        """Return the full prompt sent for get_insurance_info."""
+        query = self._insurance_info_query(insurance_type, country, language)
+        return self._build_prompt(query, country, language, insurance_type)
+    
+    def insurance_info_fingerprint(self, insurance_type, country, language):
+        """Return a fingerprint that changes whenever the overview prompt or model changes."""
+        return self._cache_key(self.insurance_info_prompt(insurance_type, country, language))
+    
+    def get_insurance_info(self, insurance_type, country, language, session_id=None):
+        """Get general information about a specific insurance type."""
+        prompt = self._insurance_info_query(insurance_type, country, language)
+        return self.generate_response(prompt, country, language, insurance_type,
+                                      session_id=session_id, priority=PRIORITY_OVERVIEW)
\ No newline at end of file
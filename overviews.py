@@ -0,0 +1,95 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Bump when the artifact layout changes; older artifacts are ignored
+ARTIFACT_VERSION = 1
+
+def insurance_type_name(type_id):
+    """Return the display name of an insurance type without its emoji, e.g. "Auto"."""
+    return CONFIG["insurance_types"][type_id].split()[1]
+
+def cell_key(type_id, country, language):
+    """Return the artifact key for one insurance type / country / language cell."""
+    return f"{type_id}|{country}|{language}"
+
+
+class OverviewStore:
+    """Pre-generated insurance overviews, stored as a versioned gzipped JSON artifact."""
+    
+    def __init__(self, model_id=None, entries=None):
+        self.model_id = model_id or CONFIG["model_id"]
+        self.entries = entries or {}  # cell key -> {"text", "fingerprint", "generated_at"}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def load(cls, path=None):
+        """Load an artifact from disk. Missing or incompatible artifacts give an empty store."""
+        path = path or CONFIG["overviews_path"]
+        if not os.path.exists(path):
+            return cls()
+        
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read overviews artifact {path}: {str(e)}")
+            return cls()
+        
+        if data.get("version") != ARTIFACT_VERSION:
+            logger.warning(f"Ignoring overviews artifact {path} with version {data.get('version')}")
+            return cls()
+        
+        logger.info(f"Loaded {len(data['entries'])} pre-generated overviews from {path}")
+        return cls(data["model_id"], data["entries"])
+    
+    def save(self, path=None):
+        """Write the artifact atomically so an interrupted save never corrupts it."""
+        path = path or CONFIG["overviews_path"]
+        with self._lock:
+            data = {
+                "version": ARTIFACT_VERSION,
+                "model_id": self.model_id,
+                "saved_at": time.time(),
+                "entries": dict(self.entries)
+            }
+        
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    
+    def get(self, type_id, country, language, fingerprint=None):
+        """
+        Return the overview text for a cell, or None if it is missing.
+        When a fingerprint is given, entries generated from a different prompt are treated as missing.
+        """
+        entry = self.entries.get(cell_key(type_id, country, language))
+        if entry is None or (fingerprint is not None and entry["fingerprint"] != fingerprint):
+            return None
+        return entry["text"]
+    
+    def put(self, type_id, country, language, text, fingerprint):
+        """Store the overview text for a cell."""
+        with self._lock:
+            self.entries[cell_key(type_id, country, language)] = {
+                "text": text,
+                "fingerprint": fingerprint,
+                "generated_at": time.time()
+            }
+    
+    def is_fresh(self, type_id, country, language, fingerprint, max_age=None):
+        """Check whether a cell exists, matches the fingerprint and is younger than max_age seconds."""
+        entry = self.entries.get(cell_key(type_id, country, language))
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return False
+        return max_age is None or time.time() - entry["generated_at"] <= max_age
+    
+    def __len__(self):
+        return len(self.entries)
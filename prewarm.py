@@ -0,0 +1,155 @@
+"""
+Pre-generate insurance overviews for every insurance type, country and language.
+
+Usage:
+    python prewarm.py                      # generate missing or stale overviews
+    python prewarm.py --concurrency 2 --rate 20
+    python prewarm.py --max-age 7          # also refresh overviews older than 7 days
+    python prewarm.py --force              # regenerate everything
+"""
+import argparse
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import bootstrap
+from config import CONFIG
+from model import InsuranceLLM, InferenceError
+from overviews import OverviewStore, insurance_type_name
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Spaces out request starts to stay under a requests-per-minute limit.
+    After a failure every worker pauses for a cooldown that doubles on repeated failures.
+    """
+    
+    def __init__(self, requests_per_minute, base_cooldown=5, max_cooldown=300):
+        self.interval = 60.0 / requests_per_minute
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = base_cooldown
+        self._next_start = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        """Block until the caller may start its next request."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        time.sleep(max(0, start - now))
+    
+    def record_success(self):
+        with self._lock:
+            self.cooldown = self.base_cooldown
+    
+    def record_failure(self):
+        """Push back the next request start, assuming the API is throttling us."""
+        with self._lock:
+            self._next_start = max(self._next_start, time.monotonic() + self.cooldown)
+            logger.warning(f"Request failed, pausing all workers for {self.cooldown}s")
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+
+
+def plan_cells(llm, store, types, countries, languages, max_age=None, force=False):
+    """Return the (type_id, country, language, fingerprint) cells that need generating."""
+    cells = []
+    for type_id, country, language in itertools.product(types, countries, languages):
+        fingerprint = llm.insurance_info_fingerprint(insurance_type_name(type_id), country, language)
+        if force or not store.is_fresh(type_id, country, language, fingerprint, max_age):
+            cells.append((type_id, country, language, fingerprint))
+    return cells
+
+def generate_cell(llm, limiter, type_id, country, language):
+    """Generate one overview, raising InferenceError if the API could not produce it."""
+    limiter.wait()
+    prompt = llm.insurance_info_prompt(insurance_type_name(type_id), country, language)
+    try:
+        text = llm.generate_text(prompt)
+    except InferenceError:
+        limiter.record_failure()
+        raise
+    limiter.record_success()
+    return text
+
+def prewarm(path, concurrency, requests_per_minute, max_age=None, force=False,
+            types=None, countries=None, languages=None, checkpoint_every=10):
+    """Generate all missing or stale overviews and save them to the artifact at path."""
+    llm = InsuranceLLM()
+    store = OverviewStore.load(path)
+    if store.model_id != llm.model_id:
+        logger.info(f"Artifact was built with {store.model_id}; regenerating for {llm.model_id}")
+        store = OverviewStore(llm.model_id)
+    
+    cells = plan_cells(
+        llm, store,
+        types or list(CONFIG["insurance_types"]),
+        countries or CONFIG["countries"],
+        languages or CONFIG["supported_languages"],
+        max_age, force
+    )
+    logger.info(f"{len(store)} overviews in artifact, {len(cells)} to generate")
+    if not cells:
+        return 0
+    
+    limiter = RateLimiter(requests_per_minute)
+    failures = 0
+    done = 0
+    
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(generate_cell, llm, limiter, type_id, country, language): (type_id, country, language, fingerprint)
+                for type_id, country, language, fingerprint in cells
+            }
+            for future in as_completed(futures):
+                type_id, country, language, fingerprint = futures[future]
+                try:
+                    store.put(type_id, country, language, future.result(), fingerprint)
+                except InferenceError as e:
+                    failures += 1
+                    logger.error(f"Failed to generate {type_id}/{country}/{language}: {str(e)}")
+                    continue
+                
+                done += 1
+                # Checkpoint regularly so an interrupted run can resume where it stopped
+                if done % checkpoint_every == 0:
+                    store.save(path)
+                    logger.info(f"Progress: {done}/{len(cells)} generated")
+    finally:
+        store.save(path)
+    
+    logger.info(f"Generated {done} overviews, {failures} failed; artifact has {len(store)} entries")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate insurance overviews for all configured cells.")
+    parser.add_argument("--output", default=CONFIG["overviews_path"], help="Artifact path")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum concurrent API requests")
+    parser.add_argument("--rate", type=float, default=30, help="Maximum requests started per minute")
+    parser.add_argument("--max-age", type=float, help="Regenerate overviews older than this many days")
+    parser.add_argument("--force", action="store_true", help="Regenerate every overview")
+    parser.add_argument("--types", nargs="+", choices=list(CONFIG["insurance_types"]), help="Only these insurance types")
+    parser.add_argument("--countries", nargs="+", help="Only these countries")
+    parser.add_argument("--languages", nargs="+", help="Only these languages")
+    args = parser.parse_args()
+    bootstrap.init()
+    
+    failures = prewarm(
+        args.output,
+        args.concurrency,
+        args.rate,
+        max_age=args.max_age * 24 * 60 * 60 if args.max_age is not None else None,
+        force=args.force,
+        types=args.types,
+        countries=args.countries,
+        languages=args.languages
+    )
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
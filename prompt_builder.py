@@ -0,0 +1,126 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from config import CONFIG
+from insurance_logic import REGULATORY_NOTE_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# Rough stand-in for a subword tokenizer: words are split into pieces of up to 4 characters
+TOKEN_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+
+HISTORY_HEADER = "Previous conversation:\n"
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a text."""
+    return len(TOKEN_PATTERN.findall(text))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text down to at most max_tokens tokens, marking the cut with an ellipsis."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 1:
+        return ""
+    # Leave room for the ellipsis, which counts as one token
+    for i, match in enumerate(TOKEN_PATTERN.finditer(text)):
+        if i == max_tokens - 1:
+            return text[:match.start()].rstrip() + "…"
+    return text
+
+def strip_regulatory_note(text: str) -> str:
+    """Remove the regulatory note appended by InsuranceAssistant.format_response."""
+    return text.split(REGULATORY_NOTE_PREFIX, 1)[0]
+
+
+@dataclass
+class BuiltPrompt:
+    """A prompt together with its estimated token count per section."""
+    text: str
+    tokens: int
+    sections: Dict[str, int] = field(default_factory=dict)
+    passages: int = 0  # Retrieved passages that fit in the budget
+
+
+class PromptBuilder:
+    """
+    Assembles prompts within a token budget.
+    
+    The base prompt (instructions and query) is always kept. Retrieved passages are
+    dropped lowest-ranked first until the base fits. The most recent turns are kept
+    verbatim, without regulatory notes, and older turns are compacted into a short
+    summary of what the user asked.
+    """
+    
+    def __init__(self, token_budget: Optional[int] = None, recent_turns: Optional[int] = None,
+                 summary_tokens: Optional[int] = None):
+        self.token_budget = token_budget or CONFIG["prompt_token_budget"]
+        self.recent_turns = recent_turns if recent_turns is not None else CONFIG["prompt_recent_turns"]
+        self.summary_tokens = summary_tokens if summary_tokens is not None else CONFIG["prompt_summary_tokens"]
+    
+    def _format_turn(self, entry) -> str:
+        return f"User: {entry['user']}\nAssistant: {strip_regulatory_note(entry['assistant'])}\n"
+    
+    def _summarize(self, entries, max_tokens: int) -> str:
+        """Summarize older turns as the questions the user asked, dropping the oldest if space is short."""
+        questions = [" ".join(entry["user"].split()) for entry in entries]
+        prefix = "Earlier, the user asked about: "
+        while len(questions) > 1 and estimate_tokens(prefix + "; ".join(questions)) > max_tokens:
+            questions.pop(0)
+            prefix = "Earlier, the user asked about: …; "
+        return truncate_to_tokens(prefix + "; ".join(questions), max_tokens)
+    
+    def build(self, make_base_prompt: Callable[[List[dict]], str], passages: Optional[List[dict]] = None,
+              chat_history: Optional[List[dict]] = None) -> BuiltPrompt:
+        """
+        Build a prompt. make_base_prompt receives the passages to include and returns the
+        instructions and query; history is fitted into whatever budget remains.
+        """
+        passages = list(passages or [])
+        base_prompt = make_base_prompt(passages)
+        while passages and estimate_tokens(base_prompt) > self.token_budget:
+            passages.pop()
+            base_prompt = make_base_prompt(passages)
+        
+        base_tokens = estimate_tokens(base_prompt)
+        if base_tokens > self.token_budget:
+            logger.warning(f"Prompt without history uses {base_tokens} tokens, over the budget of {self.token_budget}")
+        history = list(chat_history or [])
+        
+        # Separators and the history header are counted up front
+        remaining = self.token_budget - base_tokens
+        if history:
+            remaining -= estimate_tokens(HISTORY_HEADER)
+        sections = {"base": base_tokens, "history": 0, "summary": 0}
+        
+        oldest_recent = max(0, len(history) - self.recent_turns)
+        
+        # Keep the most recent turns that fit, newest first; everything older is summarized
+        kept = []
+        first_kept = len(history)
+        for i in range(len(history) - 1, oldest_recent - 1, -1):
+            turn = self._format_turn(history[i])
+            available = remaining - (self.summary_tokens if i > 0 else 0)
+            if estimate_tokens(turn) > available:
+                if not kept and available > 0:
+                    # Keep part of the latest turn so follow-up questions still make sense
+                    kept.append(truncate_to_tokens(turn, available) + "\n")
+                    first_kept = i
+                    remaining -= estimate_tokens(kept[0])
+                break
+            kept.insert(0, turn)
+            first_kept = i
+            remaining -= estimate_tokens(turn)
+        sections["history"] = sum(estimate_tokens(turn) for turn in kept)
+        older = history[:first_kept]
+        
+        context = ""
+        if older and remaining > 0:
+            summary = self._summarize(older, min(self.summary_tokens, remaining))
+            sections["summary"] = estimate_tokens(summary)
+            context += summary + "\n"
+        if kept:
+            context += HISTORY_HEADER + "".join(kept)
+        
+        text = context + "\n\n" + base_prompt if context else base_prompt
+        return BuiltPrompt(text, estimate_tokens(text), sections, len(passages))
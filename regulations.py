@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import threading
+import time
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Used when no regulations file can be loaded at all
+DEFAULT_REGULATION = "Insurance regulations vary by country and region."
+
+
+class RegulationsStore:
+    """
+    Insurance regulations loaded from an external JSON file.
+    
+    Fallbacks (insurance type -> country default -> global default) are resolved
+    when the file is loaded, so a lookup is two dict lookups. The file is
+    re-read when its modification time changes, checked at most once per
+    reload interval.
+    """
+    
+    def __init__(self, path, reload_interval=5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mtime = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        self._default = DEFAULT_REGULATION
+        self._default_regulations = {"default": DEFAULT_REGULATION}
+        self._index = {}  # country -> {insurance type or "default" -> regulation}
+        self._data = {}
+        self._version = 0  # Increased on every successful load
+        self.reload()
+    
+    @staticmethod
+    def _validate(data):
+        """Raise ValueError unless data has the shape of a regulations file."""
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+        if not isinstance(data.get("default", DEFAULT_REGULATION), str):
+            raise ValueError('"default" must be a string')
+        countries = data.get("countries", {})
+        if not isinstance(countries, dict):
+            raise ValueError('"countries" must be an object')
+        for country, country_regulations in countries.items():
+            if not isinstance(country_regulations, dict):
+                raise ValueError(f'regulations for "{country}" must be an object')
+            for insurance_type, regulation in country_regulations.items():
+                if not isinstance(regulation, str):
+                    raise ValueError(f'regulation "{country}"/"{insurance_type}" must be a string')
+    
+    def _build_index(self, data):
+        """Resolve every (country, insurance type) pair to its final regulation text."""
+        self._validate(data)
+        default = data.get("default", DEFAULT_REGULATION)
+        countries = data.get("countries", {})
+        
+        insurance_types = set(CONFIG["insurance_types"])
+        for country_regulations in countries.values():
+            insurance_types.update(country_regulations)
+        insurance_types.discard("default")
+        
+        index = {}
+        for country, country_regulations in countries.items():
+            country_default = country_regulations.get("default", default)
+            resolved = {insurance_type: country_regulations.get(insurance_type, country_default) for insurance_type in insurance_types}
+            resolved["default"] = country_default
+            index[country] = resolved
+        
+        default_regulations = {insurance_type: default for insurance_type in insurance_types}
+        default_regulations["default"] = default
+        return index, default_regulations, default
+    
+    def reload(self):
+        """Load the regulations file. On error the previously loaded regulations are kept."""
+        with self._reload_lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                index, default_regulations, default = self._build_index(data)
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load regulations from {self.path}: {str(e)}")
+                return False
+            
+            # Swap in the new tables; readers see either the old or the new set
+            self._index, self._default_regulations, self._default = index, default_regulations, default
+            self._data = data
+            self._version += 1
+            self._mtime = mtime
+            logger.info(f"Loaded regulations for {len(index)} countries from {self.path}")
+            return True
+    
+    def _maybe_reload(self):
+        """Reload the file if it changed, checking its modification time at most once per interval."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            changed = os.path.getmtime(self.path) != self._mtime
+        except OSError:
+            return
+        if changed:
+            self.reload()
+    
+    def get(self, insurance_type, country):
+        """Return the regulation text for an insurance type in a country, with fallbacks."""
+        self._maybe_reload()
+        country_regulations = self._index.get(country, self._default_regulations)
+        return country_regulations.get(insurance_type, country_regulations["default"])
+    
+    def snapshot(self):
+        """
+        Return (version, data) of the loaded regulations file, picking up changes like get().
+        Indexes built from the regulations are rebuilt when the version changes.
+        """
+        self._maybe_reload()
+        return self._version, self._data
+    
+    def countries(self):
+        """Return the countries that have regulations."""
+        return list(self._index)
+
+
+# Process-wide store shared by every InsuranceAssistant
+_store = None
+_store_lock = threading.Lock()
+
+def get_regulations_store():
+    """Return the process-wide regulations store, loading it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RegulationsStore(CONFIG["regulations_path"], CONFIG["regulations_reload_interval"])
+    return _store
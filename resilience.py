@@ -0,0 +1,176 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying; other client errors won't succeed on a retry
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Deadline:
+    """Overall time budget for a request, shared by all of its attempts."""
+    
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+    
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self):
+        return self.remaining() <= 0
+    
+    def attempt_timeout(self, timeout):
+        """Return the timeout for the next attempt: the per-attempt timeout, cut to the time left."""
+        return min(timeout, self.remaining())
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honoring Retry-After and the request deadline."""
+    
+    def __init__(self, base_delay=None, max_delay=None):
+        self.base_delay = base_delay if base_delay is not None else CONFIG["retry_base_delay"]
+        self.max_delay = max_delay if max_delay is not None else CONFIG["retry_max_delay"]
+    
+    def delay(self, attempt, retry_after=None):
+        """Return the delay before the next attempt."""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+    
+    def wait(self, attempt, deadline, retry_after=None):
+        """
+        Sleep before the next attempt. Returns False without sleeping if the
+        next attempt could not start before the deadline.
+        """
+        delay = self.delay(attempt, retry_after)
+        if delay >= deadline.remaining():
+            logger.warning(f"Not retrying: backoff of {delay:.1f}s would pass the request deadline")
+            record_event("deadline_exceeded")
+            return False
+        record_event("retries")
+        record_event("backoff_seconds", delay)
+        time.sleep(delay)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Shared circuit breaker for an upstream endpoint.
+    
+    After failure_threshold consecutive failures the circuit opens and requests
+    are rejected immediately. After reset_timeout one trial request is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or CONFIG["circuit_failure_threshold"]
+        self.reset_timeout = reset_timeout or CONFIG["circuit_reset_timeout"]
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.transitions = Counter()  # "closed->open" etc. -> count
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    def _transition(self, state):
+        transition = f"{self.state}->{state}"
+        self.transitions[transition] += 1
+        logger.warning(f"Circuit '{self.name}' {transition}")
+        self.state = state
+    
+    def allow_request(self):
+        """Return True if a request may be sent now."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    record_event("circuit_rejected")
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    record_event("circuit_rejected")
+                    return False
+                self._trial_in_flight = True
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self._transition(self.OPEN)
+    
+    def release_trial(self):
+        """
+        Free the half-open trial slot when a request ends without a recorded outcome
+        (a non-retryable error, an unexpected exception or an abandoned stream), so
+        the next request can be the trial. Does nothing otherwise.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, "transitions": dict(self.transitions)}
+
+
+# Process-wide resilience counters (retries, backoff time, rejections)
+_events = Counter()
+_events_lock = threading.Lock()
+
+def record_event(name, amount=1):
+    """Add to a resilience counter."""
+    with _events_lock:
+        _events[name] += amount
+
+def event_counts():
+    """Return a snapshot of the resilience counters."""
+    with _events_lock:
+        return dict(_events)
+
+# Circuit breakers are shared by every session talking to the same endpoint
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(name):
+    """Return the process-wide circuit breaker for an endpoint."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+def circuit_breakers():
+    """Return a snapshot of the circuit breakers by endpoint."""
+    with _breakers_lock:
+        return dict(_breakers)
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(model_id, prompt, parameters):
+    """
+    Build a cache key from the normalized prompt and generation parameters.
+    Whitespace and case differences in the prompt map to the same key.
+    """
+    normalized_prompt = " ".join(prompt.split()).lower()
+    key_data = json.dumps(
+        {"model": model_id, "prompt": normalized_prompt, "parameters": parameters},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Base class for response caches. Keeps hit, miss and eviction counters."""
+    
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+    
+    def _record(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def get(self, key):
+        """Return the cached response for a key, or None if missing or expired."""
+        raise NotImplementedError
+    
+    def set(self, key, value):
+        """Store a response under a key."""
+        raise NotImplementedError
+    
+    def clear(self):
+        """Remove all cached responses."""
+        raise NotImplementedError
+    
+    def __len__(self):
+        raise NotImplementedError
+    
+    def stats(self):
+        """Return the cache counters."""
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self)
+            }
+
+
+class MemoryResponseCache(ResponseCache):
+    """In-process LRU cache with a time-to-live per entry."""
+    
+    def __init__(self, max_entries, ttl):
+        super().__init__(max_entries, ttl)
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        self._record(entry is not None)
+        return entry[1] if entry is not None else None
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    On-disk cache backed by SQLite so several worker processes can share responses.
+    Uses wall-clock expiry and evicts the least recently used rows when full.
+    """
+    
+    def __init__(self, path, max_entries, ttl):
+        super().__init__(max_entries, ttl)
+        self.path = path
+        self._local = threading.local()  # SQLite connections can't be shared across threads
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+    
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, key):
+        now = time.time()
+        value = None
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] >= now:
+                    value = row[0]
+                    conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                elif row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.error(f"Response cache read failed: {str(e)}")
+        self._record(value is not None)
+        return value
+    
+    def set(self, key, value):
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now + self.ttl, now)
+                )
+                overflow = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                        (overflow,)
+                    )
+                    with self._stats_lock:
+                        self.evictions += overflow
+        except sqlite3.Error as e:
+            logger.error(f"Response cache write failed: {str(e)}")
+    
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM responses")
+    
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+# Process-wide cache shared by every InsuranceLLM instance
+_cache = None
+_cache_lock = threading.Lock()
+
+def create_response_cache(backend=None):
+    """Create a response cache for the given backend name ("memory" or "sqlite")."""
+    backend = backend or CONFIG["response_cache_backend"]
+    max_entries = CONFIG["response_cache_max_entries"]
+    ttl = CONFIG["response_cache_ttl"]
+    
+    if backend == "memory":
+        return MemoryResponseCache(max_entries, ttl)
+    if backend == "sqlite":
+        return SQLiteResponseCache(os.path.abspath(CONFIG["response_cache_path"]), max_entries, ttl)
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+def get_response_cache():
+    """Return the process-wide response cache, or None if caching is disabled."""
+    global _cache
+    if not CONFIG["response_cache_backend"]:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_response_cache()
+                logger.info(f"Using {CONFIG['response_cache_backend']} response cache")
+    return _cache
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from collections import Counter
+import numpy as np
+import bootstrap
+from config import CONFIG
+from regulations import get_regulations_store
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk index layout changes
+INDEX_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i if in insurance is it me my of on or
+should the their there this to was what when where which who why will with you your
+""".split())
+
+def tokenize(text):
+    """Split text into lowercase terms, dropping common stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def load_passages(knowledge_path, regulations):
+    """
+    Load passages from the knowledge base (JSONL) and the loaded regulations file data.
+    Each passage is a dict with "id", "country", "insurance_type", "question" and "text".
+    """
+    passages = []
+    with open(knowledge_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                passage = json.loads(line)
+                passage.setdefault("country", "*")
+                passage.setdefault("insurance_type", None)
+                passage.setdefault("question", None)
+                passages.append(passage)
+    
+    for country, country_regulations in regulations.get("countries", {}).items():
+        for insurance_type, text in country_regulations.items():
+            passages.append({
+                "id": f"regulation:{country}:{insurance_type}",
+                "country": country,
+                "insurance_type": None if insurance_type == "default" else insurance_type,
+                "question": None,
+                "text": text
+            })
+    return passages
+
+def chunk_passages(passages, chunk_words, overlap):
+    """Split long passages into overlapping chunks of at most chunk_words words."""
+    chunks = []
+    step = max(1, chunk_words - overlap)
+    for passage in passages:
+        words = passage["text"].split()
+        if len(words) <= chunk_words:
+            chunks.append(passage)
+            continue
+        for i, start in enumerate(range(0, len(words) - overlap, step)):
+            chunk = dict(passage, id=f"{passage['id']}#{i}", text=" ".join(words[start:start + chunk_words]))
+            chunks.append(chunk)
+    return chunks
+
+def source_fingerprint(knowledge_path, regulations):
+    """Hash the knowledge base file and the regulations so a stale index can be detected."""
+    digest = hashlib.sha256()
+    with open(knowledge_path, "rb") as f:
+        digest.update(f.read())
+    digest.update(json.dumps(regulations, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RetrievalIndex:
+    """
+    BM25 index over insurance passages.
+    
+    Postings are stored as NumPy arrays on disk and memory-mapped on load, so
+    worker processes share the pages and start without parsing the corpus.
+    """
+    
+    ARRAYS = ("offsets", "postings_docs", "postings_tfs", "doc_lengths", "idf")
+    
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != INDEX_VERSION:
+            raise ValueError(f"Unsupported retrieval index version: {meta['version']}")
+        
+        self.fingerprint = meta["fingerprint"]
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.avg_doc_length = meta["avg_doc_length"]
+        self.vocabulary = meta["vocabulary"]  # term -> term id
+        self.docs = meta["docs"]
+        self.countries = np.array([doc["country"] for doc in self.docs])
+        self.insurance_types = np.array([doc["insurance_type"] or "" for doc in self.docs])
+        
+        for name in self.ARRAYS:
+            setattr(self, name, np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r"))
+    
+    @classmethod
+    def build(cls, passages, index_dir, fingerprint, k1=1.5, b=0.75):
+        """
+        Build the index files for a list of passages and return the loaded index.
+        Files are written to a temporary directory that is then renamed to index_dir, so
+        other processes never load a half-written index.
+        """
+        parent = os.path.dirname(os.path.abspath(index_dir))
+        os.makedirs(parent, exist_ok=True)
+        build_dir = tempfile.mkdtemp(prefix=".build-", dir=parent)
+        try:
+            terms = cls._write(passages, build_dir, fingerprint, k1, b)
+            try:
+                os.replace(build_dir, index_dir)
+            except OSError:
+                # Another process finished the same build first; its files are used
+                if not os.path.exists(os.path.join(index_dir, "meta.json")):
+                    raise
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+        
+        logger.info(f"Built retrieval index with {len(passages)} passages and {terms} terms in {index_dir}")
+        return cls(index_dir)
+    
+    @staticmethod
+    def _write(passages, index_dir, fingerprint, k1, b):
+        """Write the arrays and meta.json of an index into index_dir. Returns the number of terms."""
+        vocabulary = {}
+        postings = []  # term id -> list of (doc id, term frequency)
+        doc_lengths = np.zeros(len(passages), dtype=np.float32)
+        
+        for doc_id, passage in enumerate(passages):
+            # Questions are indexed with the answer so FAQ passages match the way users ask
+            terms = tokenize(f"{passage['question'] or ''} {passage['text']}")
+            doc_lengths[doc_id] = len(terms)
+            for term, frequency in Counter(terms).items():
+                term_id = vocabulary.setdefault(term, len(vocabulary))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((doc_id, frequency))
+        
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(entries) for entries in postings])
+        postings_docs = np.array([doc_id for entries in postings for doc_id, _ in entries], dtype=np.int32)
+        postings_tfs = np.array([tf for entries in postings for _, tf in entries], dtype=np.float32)
+        
+        doc_frequencies = np.diff(offsets).astype(np.float32)
+        idf = np.log(1 + (len(passages) - doc_frequencies + 0.5) / (doc_frequencies + 0.5)).astype(np.float32)
+        
+        arrays = {
+            "offsets": offsets,
+            "postings_docs": postings_docs,
+            "postings_tfs": postings_tfs,
+            "doc_lengths": doc_lengths,
+            "idf": idf
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(index_dir, f"{name}.npy"), array)
+        
+        meta = {
+            "version": INDEX_VERSION,
+            "fingerprint": fingerprint,
+            "k1": k1,
+            "b": b,
+            "avg_doc_length": float(doc_lengths.mean()) if len(passages) else 0.0,
+            "vocabulary": vocabulary,
+            "docs": passages
+        }
+        with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        return len(vocabulary)
+    
+    def _term_ids(self, text):
+        """Return the known term ids of a text, without duplicates."""
+        return list(dict.fromkeys(self.vocabulary[t] for t in tokenize(text) if t in self.vocabulary))
+    
+    def _weighted_overlap(self, term_ids, other_term_ids):
+        """Return the share of the idf weight of term_ids that also appears in other_term_ids."""
+        total = sum(float(self.idf[t]) for t in term_ids)
+        if not total:
+            return 0.0
+        others = set(other_term_ids)
+        return sum(float(self.idf[t]) for t in term_ids if t in others) / total
+    
+    def search(self, query, country=None, insurance_type=None, top_k=3):
+        """
+        Return up to top_k passages for the query, best first, each with its BM25 "score".
+        Only passages for the given country (or for all countries) are considered, and
+        passages about the given insurance type are ranked higher.
+        """
+        term_ids = self._term_ids(query)
+        if not term_ids or not self.docs:
+            return []
+        
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / self.avg_doc_length)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tfs = self.postings_tfs[start:end]
+            # Each document appears once per term, so plain fancy-index addition is safe
+            scores[docs] += self.idf[term_id] * tfs * (self.k1 + 1) / (tfs + length_norm[docs])
+        
+        allowed = self.countries == "*"
+        if country:
+            allowed |= self.countries == country
+        scores[~allowed] = 0
+        if insurance_type:
+            scores[self.insurance_types == insurance_type] *= CONFIG["retrieval_type_boost"]
+        
+        top_k = min(top_k, len(scores))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [dict(self.docs[i], score=float(scores[i])) for i in ranked if scores[i] > 0]
+    
+    def answer(self, query, country=None, insurance_type=None):
+        """
+        Return a stored answer when an FAQ passage matches the query closely enough, else None.
+        The query and the FAQ question must each cover most of the other's idf weight.
+        """
+        threshold = CONFIG["retrieval_answer_threshold"]
+        query_terms = self._term_ids(query)
+        for passage in self.search(query, country, insurance_type, top_k=CONFIG["retrieval_top_k"]):
+            if not passage["question"]:
+                continue
+            question_terms = self._term_ids(passage["question"])
+            if (self._weighted_overlap(query_terms, question_terms) >= threshold
+                    and self._weighted_overlap(question_terms, query_terms) >= threshold):
+                return passage["text"]
+        return None
+
+
+# Process-wide index shared by every InsuranceLLM instance, and the regulations version it was built from
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+def index_path(fingerprint):
+    """Return the directory of the index built from sources with this fingerprint."""
+    return os.path.join(CONFIG["retrieval_index_dir"], f"v{INDEX_VERSION}-{fingerprint[:16]}")
+
+def remove_stale_indexes(keep):
+    """Delete index directories other than keep. Processes that still map them keep their pages."""
+    root = CONFIG["retrieval_index_dir"]
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if path != keep and not name.startswith(".") and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+def build_index(regulations=None):
+    """Build the retrieval index from the configured knowledge base and the loaded regulations."""
+    knowledge_path = CONFIG["knowledge_path"]
+    if regulations is None:
+        _, regulations = get_regulations_store().snapshot()
+    passages = chunk_passages(
+        load_passages(knowledge_path, regulations),
+        CONFIG["retrieval_chunk_words"],
+        CONFIG["retrieval_chunk_overlap"]
+    )
+    fingerprint = source_fingerprint(knowledge_path, regulations)
+    index = RetrievalIndex.build(passages, index_path(fingerprint), fingerprint)
+    remove_stale_indexes(index_path(fingerprint))
+    return index
+
+def get_retrieval_index():
+    """
+    Return the process-wide retrieval index, (re)building it if missing or stale, and
+    again whenever the regulations are reloaded. None if disabled.
+    """
+    global _index, _index_version
+    if not CONFIG["retrieval_enabled"]:
+        return None
+    version, regulations = get_regulations_store().snapshot()
+    if _index is None or _index_version != version:
+        with _index_lock:
+            if _index is None or _index_version != version:
+                fingerprint = source_fingerprint(CONFIG["knowledge_path"], regulations)
+                try:
+                    index = RetrievalIndex(index_path(fingerprint))
+                    if index.fingerprint != fingerprint:
+                        raise ValueError("retrieval index is out of date")
+                except (OSError, ValueError, KeyError) as e:
+                    logger.info(f"Rebuilding retrieval index: {str(e)}")
+                    index = build_index(regulations)
+                _index, _index_version = index, version
+    return _index
+
+if __name__ == "__main__":
+    # python retrieval.py "is car insurance mandatory in India?"
+    bootstrap.init()
+    if len(sys.argv) > 1:
+        index = get_retrieval_index()
+        for passage in index.search(" ".join(sys.argv[1:]), top_k=CONFIG["retrieval_top_k"]):
+            print(f"{passage['score']:.2f}  {passage['id']}: {passage['text']}")
+    else:
+        build_index()
@@ -0,0 +1,125 @@
+import json
+import logging
+import time
+import requests
+from config import CONFIG
+from http_client import get_session
+from conversation_store import Turn
+
+logger = logging.getLogger(__name__)
+
+
+class ChatServiceError(Exception):
+    """Raised when the chatbot API can't be reached or rejects a request."""
+
+
+class RemoteChatStream:
+    """
+    ChatStream counterpart for the HTTP API: yields text chunks from the SSE response.
+    When iteration ends, .turn and .insurance_type are set from the server's events.
+    """
+
+    def __init__(self, client, payload):
+        self.session_id = payload["session_id"]
+        self.insurance_type = payload.get("insurance_type")
+        self.turn = None
+        self._client = client
+        self._payload = payload
+
+    def __iter__(self):
+        try:
+            for event, data in self._client._events("/chat/stream", self._payload):
+                if event == "start":
+                    self.insurance_type = data["insurance_type"]
+                elif event == "done":
+                    self.turn = Turn(**data["turn"])
+                elif "text" in data:
+                    yield data["text"]
+        except ChatServiceError as e:
+            logger.error(f"Error streaming from chat service: {str(e)}")
+            if self.turn is None:
+                yield CONFIG["fallback_responses"]["api_error"]
+
+
+class ChatServiceClient:
+    """Client for the chatbot HTTP API (api.py), with the same methods as chat_service.ChatService."""
+
+    def __init__(self, base_url=None, session=None, timeout=None):
+        self.base_url = (base_url or CONFIG["chat_service_url"]).rstrip("/")
+        self.session = session or get_session()
+        self.timeout = timeout or CONFIG["api_timeout"]
+
+    def _request(self, method, path, payload=None):
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise ChatServiceError(str(e)) from e
+        if response.status_code != 200:
+            raise ChatServiceError(f"Chat service error: {response.status_code} - {response.text}")
+        return response.json()
+
+    def _events(self, path, payload):
+        """Yield (event name, data) pairs from a server-sent events response."""
+        try:
+            with self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout, stream=True) as response:
+                if response.status_code != 200:
+                    raise ChatServiceError(f"Chat service error: {response.status_code} - {response.text}")
+                event = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:"):
+                        yield event, json.loads(line[len("data:"):])
+                        event = None
+        except requests.exceptions.RequestException as e:
+            raise ChatServiceError(str(e)) from e
+
+    def warm_up(self):
+        """Open a pooled connection to the API. Returns the seconds it took, like ChatService.warm_up."""
+        started = time.perf_counter()
+        try:
+            self._request("GET", "/health")
+        except ChatServiceError as e:
+            logger.warning(f"Chat service not reachable yet: {str(e)}")
+        return {"service": time.perf_counter() - started}
+
+    def history(self, session_id):
+        return [Turn(**turn) for turn in self._request("GET", f"/sessions/{session_id}")["turns"]]
+
+    def clear(self, session_id):
+        self._request("DELETE", f"/sessions/{session_id}")
+
+    def insurance_info(self, session_id, insurance_type, country, language):
+        result = self._request("POST", "/insurance-info", {
+            "session_id": session_id,
+            "insurance_type": insurance_type,
+            "country": country,
+            "language": language
+        })
+        return Turn(**result["turn"])
+
+    def chat(self, session_id, message, country, language, insurance_type=None):
+        result = self._request("POST", "/chat", {
+            "session_id": session_id,
+            "message": message,
+            "country": country,
+            "language": language,
+            "insurance_type": insurance_type
+        })
+        return Turn(**result["turn"])
+
+    def chat_stream(self, session_id, message, country, language, insurance_type=None):
+        return RemoteChatStream(self, {
+            "session_id": session_id,
+            "message": message,
+            "country": country,
+            "language": language,
+            "insurance_type": insurance_type
+        })
+
+    def classify(self, messages, language=None, country=None):
+        return self._request("POST", "/classify", {
+            "messages": list(messages),
+            "language": language,
+            "country": country
+        })["results"]
@@ -0,0 +1,97 @@
+import itertools
+import threading
+import time
+import model
+from admission import AdmissionController
+from backends import InferenceBackend
+from config import CONFIG
+from model import InsuranceLLM
+from response_cache import MemoryResponseCache
+
+_endpoints = itertools.count()
+
+
+class GatedBackend(InferenceBackend):
+    """Backend whose calls block until the gate opens, so other callers can join them in flight."""
+
+    def __init__(self):
+        self.name = f"gated-{next(_endpoints)}"
+        self.gate = threading.Event()
+        self.calls = 0
+
+    def generate(self, prompt, parameters, timeout):
+        self.calls += 1
+        assert self.gate.wait(5)
+        return f"answer to {prompt}"
+
+
+def _llm(monkeypatch, admission):
+    for key, value in {"failover_backend": None, "batching_enabled": False, "max_retries": 1}.items():
+        monkeypatch.setitem(CONFIG, key, value)
+    llm = InsuranceLLM(cache=MemoryResponseCache(10, 60), backend=GatedBackend(), admission=admission)
+    # Every query goes to the model, with the query itself as the prompt
+    monkeypatch.setattr(llm, "_answer_locally", lambda *args: None)
+    monkeypatch.setattr(llm, "_build_prompt", lambda query, *args: query)
+    return llm
+
+def _ask(llm, query, session_id, results):
+    thread = threading.Thread(target=lambda: results.append(llm.generate_response(query, "India", "English", session_id=session_id)))
+    thread.start()
+    return thread
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_callers_joining_a_call_in_flight_share_its_slot(monkeypatch):
+    admission = AdmissionController(max_concurrency=1, max_queue=0, max_wait=1, session_rpm=60, session_burst=1, global_rpm=0)
+    llm = _llm(monkeypatch, admission)
+    coalesced = model._inflight_requests.coalesced
+    leader_results, follower_results = [], []
+
+    leader = _ask(llm, "same question", "a", leader_results)
+    _wait_for(lambda: llm.backend.calls == 1)
+    follower = _ask(llm, "same question", "b", follower_results)
+    _wait_for(lambda: model._inflight_requests.coalesced == coalesced + 1)
+    llm.backend.gate.set()
+    leader.join()
+    follower.join()
+
+    assert leader_results == follower_results == ["answer to same question"]
+    assert llm.backend.calls == 1
+    assert admission.outcomes == {"admitted": 1}
+    # The follower's request still counts against its own session's rate
+    assert llm.generate_response("another question", "India", "English", session_id="b") == CONFIG["fallback_responses"]["rate_limited"]
+
+def test_rate_limited_session_cannot_join_another_sessions_call(monkeypatch):
+    admission = AdmissionController(max_concurrency=1, max_queue=0, max_wait=1, session_rpm=60, session_burst=1, global_rpm=0)
+    llm = _llm(monkeypatch, admission)
+    admission.check_session("limited")
+    leader_results, limited_results = [], []
+
+    leader = _ask(llm, "same question", "a", leader_results)
+    _wait_for(lambda: llm.backend.calls == 1)
+    limited = _ask(llm, "same question", "limited", limited_results)
+    limited.join()
+    llm.backend.gate.set()
+    leader.join()
+
+    assert limited_results == [CONFIG["fallback_responses"]["rate_limited"]]
+    assert leader_results == ["answer to same question"]
+    assert llm.backend.calls == 1
+
+def test_shed_request_refunds_the_session_token(monkeypatch):
+    admission = AdmissionController(max_concurrency=1, max_queue=0, max_wait=1, session_rpm=60, session_burst=1, global_rpm=0)
+    llm = _llm(monkeypatch, admission)
+    results = []
+
+    leader = _ask(llm, "first question", "a", results)
+    _wait_for(lambda: llm.backend.calls == 1)
+    # No slot and no queue: shed, without spending session b's only token
+    assert llm.generate_response("second question", "India", "English", session_id="b") == CONFIG["fallback_responses"]["busy"]
+    llm.backend.gate.set()
+    leader.join()
+    assert llm.generate_response("second question", "India", "English", session_id="b") == "answer to second question"
@@ -0,0 +1,72 @@
+import threading
+import time
+import pytest
+import backends
+from backends import BackendError, BackendTimeout, LlamaCppBackend
+
+
+class FakeLlama:
+    """Stands in for llama_cpp.Llama: streams the given chunks, optionally slowly, or raises."""
+
+    def __init__(self, chunks=("Hello", " world", ""), delay=0.0, error=None):
+        self.chunks = chunks
+        self.delay = delay
+        self.error = error
+        self.closed = False
+
+    def __call__(self, prompt, stream=False, **arguments):
+        assert stream
+        if self.error is not None:
+            raise self.error
+        return self._stream()
+
+    def _stream(self):
+        try:
+            for text in self.chunks:
+                time.sleep(self.delay)
+                yield {"choices": [{"text": text}]}
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def local_backend(monkeypatch, tmp_path):
+    backend = LlamaCppBackend(str(tmp_path / "model.gguf"))
+
+    def install(model):
+        monkeypatch.setitem(backends._llama_models, backend.model_path, (model, threading.Lock()))
+        return backend
+    return install
+
+
+def test_generate_joins_the_stream(local_backend):
+    backend = local_backend(FakeLlama())
+    assert backend.generate("prompt", {}, timeout=5) == "Hello world"
+    assert list(backend.stream("prompt", {}, timeout=5)) == ["Hello", " world"]
+
+def test_generation_is_stopped_at_the_timeout(local_backend):
+    model = FakeLlama(chunks=["token"] * 50, delay=0.02)
+    backend = local_backend(model)
+    with pytest.raises(BackendTimeout):
+        backend.generate("prompt", {}, timeout=0.1)
+    # llama.cpp is stopped and the model is free for the next generation
+    assert model.closed
+    assert backends._llama_models[backend.model_path][1].acquire(blocking=False)
+
+def test_waiting_for_a_busy_model_counts_towards_the_timeout(local_backend):
+    backend = local_backend(FakeLlama())
+    _, lock = backends._llama_models[backend.model_path]
+    with lock:
+        with pytest.raises(BackendTimeout):
+            backend.generate("prompt", {}, timeout=0.05)
+
+@pytest.mark.parametrize("error, retryable", [
+    (ValueError("Requested tokens exceed context window"), False),
+    (RuntimeError("llama_decode returned -1"), True)
+])
+def test_llama_errors_are_raised_as_backend_errors(local_backend, error, retryable):
+    backend = local_backend(FakeLlama(error=error))
+    with pytest.raises(BackendError) as raised:
+        backend.generate("prompt", {}, timeout=5)
+    assert raised.value.retryable is retryable
+    assert raised.value.__cause__ is error
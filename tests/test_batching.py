@@ -0,0 +1,65 @@
+import itertools
+import threading
+import pytest
+from config import CONFIG
+from backends import BackendError, InferenceBackend
+from batching import BatchingBackend
+from model import InferenceError, InsuranceLLM
+from resilience import get_circuit_breaker
+from response_cache import MemoryResponseCache
+
+_endpoints = itertools.count()
+
+
+class BatchBackend(InferenceBackend):
+    """Backend whose batch requests return the prompts upper-cased, or fail as a whole."""
+
+    def __init__(self, error=None):
+        self.name = f"batch-{next(_endpoints)}"
+        self.error = error
+        self.batches = []
+
+    def generate(self, prompt, parameters, timeout):
+        return self.generate_batch([prompt], parameters, timeout)[0]
+
+    def generate_batch(self, prompts, parameters, timeout):
+        self.batches.append(list(prompts))
+        if self.error is not None:
+            raise self.error
+        return [prompt.upper() for prompt in prompts]
+
+
+def _concurrently(fn, count):
+    results = [None] * count
+    def run(i):
+        try:
+            results[i] = fn(i)
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_batch_and_get_their_own_result():
+    upstream = BatchBackend()
+    batching = BatchingBackend(upstream, max_batch_size=4, max_wait=0.2, max_concurrency=1)
+    results = _concurrently(lambda i: batching.generate(f"prompt {i}", {}, timeout=5), 4)
+    assert results == [f"PROMPT {i}" for i in range(4)]
+    assert len(upstream.batches) == 1
+
+def test_failed_batch_counts_once_against_the_circuit_breaker(monkeypatch):
+    for key, value in {"failover_backend": None, "batching_enabled": False, "max_retries": 1}.items():
+        monkeypatch.setitem(CONFIG, key, value)
+    upstream = BatchBackend(error=BackendError("upstream returned 503", status_code=503))
+    batching = BatchingBackend(upstream, max_batch_size=4, max_wait=0.2, max_concurrency=1)
+    llm = InsuranceLLM(cache=MemoryResponseCache(10, 60), backend=batching)
+    breaker = get_circuit_breaker(batching.endpoint)
+
+    results = _concurrently(lambda i: llm._request_from_backend(batching, f"prompt {i}"), 4)
+    assert all(isinstance(result, InferenceError) for result in results)
+    assert len(upstream.batches) == 1
+    assert breaker.failures == 1
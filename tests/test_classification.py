@@ -0,0 +1,22 @@
+import os
+from config import CONFIG
+from insurance_logic import classify_messages
+
+MESSAGES = ["My car was hit", {"id": "a", "message": "house fire", "country": "India"}, "Hello there"] * 20
+
+def test_pool_results_match_in_process_results(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    monkeypatch.setitem(CONFIG, "classify_parallel_min_messages", 10)
+    expected = list(classify_messages(MESSAGES, country="Canada", batch_size=7))
+    assert list(classify_messages(MESSAGES, country="Canada", processes=2, batch_size=7)) == expected
+    assert [result["id"] for result in expected][:3] == [0, "a", 2]
+
+def test_short_input_is_classified_without_a_pool(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    monkeypatch.setitem(CONFIG, "classify_parallel_min_messages", 1000)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a process pool was started")
+    import concurrent.futures
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", no_pool)
+    assert len(list(classify_messages(MESSAGES, processes=4, batch_size=7))) == len(MESSAGES)
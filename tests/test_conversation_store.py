@@ -0,0 +1,34 @@
+import threading
+from conversation_store import RetentionPolicy, SQLiteConversationStore
+
+def _store(tmp_path):
+    return SQLiteConversationStore(str(tmp_path / "conversations.db"), RetentionPolicy(10, 10, 0))
+
+def test_stores_sharing_a_file_hand_out_distinct_ids(tmp_path):
+    first, second = _store(tmp_path), _store(tmp_path)
+    ids = [first.append("s", "q1", "a1").id, second.append("s", "q2", "a2").id, first.append("s", "q3", "a3").id]
+    assert ids == [0, 1, 2]
+    assert [turn.user for turn in first.history("s", refresh=True)] == ["q1", "q2", "q3"]
+
+def test_history_is_read_while_a_write_is_in_progress(tmp_path):
+    store = _store(tmp_path)
+    store.append("reader", "q", "a")
+    writing, release = threading.Event(), threading.Event()
+    persist, timed_out = store._persist, []
+
+    def slow_persist(session_id, turn):
+        writing.set()
+        timed_out.append(not release.wait(2))
+        return persist(session_id, turn)
+    store._persist = slow_persist
+
+    writer = threading.Thread(target=store.append, args=("writer", "q", "a"))
+    writer.start()
+    try:
+        assert writing.wait(5)
+        assert [turn.user for turn in store.history("reader", refresh=True)] == ["q"]
+    finally:
+        release.set()
+        writer.join()
+    assert timed_out == [False]  # The read didn't have to wait for the write
+    assert [turn.id for turn in store.history("writer")] == [0]
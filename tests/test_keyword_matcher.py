@@ -0,0 +1,96 @@
+import json
+import re
+import unicodedata
+import pytest
+from config import CONFIG
+from insurance_logic import KeywordMatcher, _build_matcher
+
+
+class RegexKeywordMatcher:
+    """The previous matcher, one alternation of every keyword, kept as the reference output."""
+
+    def __init__(self, keywords_by_type):
+        keyword_types = {}
+        for insurance_type, keywords in keywords_by_type.items():
+            for keyword in keywords:
+                types = keyword_types.setdefault(keyword.lower(), [])
+                if insurance_type not in types:
+                    types.append(insurance_type)
+        self.weights = {
+            keyword: tuple((insurance_type, 1.0 / len(types)) for insurance_type in types)
+            for keyword, types in keyword_types.items()
+        }
+        groups = {"word": [], "prefix": [], "substring": []}
+        for keyword in sorted(keyword_types, key=len, reverse=True):
+            if any(unicodedata.east_asian_width(char) in ("W", "F") for char in keyword):
+                groups["substring"].append(re.escape(keyword))
+            elif all(char.isalnum() or char in " -'" for char in keyword):
+                groups["word"].append(re.escape(keyword))
+            else:
+                groups["prefix"].append(re.escape(keyword))
+        alternatives = []
+        if groups["word"]:
+            alternatives.append(rf"\b({'|'.join(groups['word'])})(?:e?s)?\b")
+        if groups["prefix"]:
+            alternatives.append(rf"(?<!\S)({'|'.join(groups['prefix'])})")
+        if groups["substring"]:
+            alternatives.append(f"({'|'.join(groups['substring'])})")
+        self.pattern = re.compile("|".join(alternatives) or r"(?!)", re.IGNORECASE)
+
+    def scores(self, message):
+        scores = {}
+        for match in self.pattern.finditer(message):
+            for insurance_type, weight in self.weights.get(match.group(match.lastindex).lower(), ()):
+                scores[insurance_type] = scores.get(insurance_type, 0.0) + weight
+        return scores
+
+
+def _keywords(language):
+    keywords = CONFIG["insurance_keywords"]
+    merged = {insurance_type: list(words) for insurance_type, words in keywords["English"].items()}
+    for insurance_type, words in keywords.get(language, {}).items():
+        merged.setdefault(insurance_type, []).extend(words)
+    return merged
+
+def _messages(language):
+    """Knowledge base text plus every keyword alone, pluralised, capitalised, inside a sentence and inside a word."""
+    with open(CONFIG["knowledge_path"], encoding="utf-8") as f:
+        passages = [json.loads(line) for line in f if line.strip()]
+    messages = [p["text"] for p in passages] + [p["question"] for p in passages if p["question"]]
+    messages += [
+        "Is car insurance mandatory in India?",
+        "My house was flooded last night, will my policy pay for the damage?",
+        "Cars, houses and pets: do I need separate policies?",
+        "vacation scattered carpets; the doctor's bill",
+        "Quelle assurance auto est obligatoire en France ?",
+        "Necesito un seguro de responsabilidad civil para mi negocio",
+        "Brauche ich eine Kfz-Versicherung für mein Auto?",
+        "मेरी कार का बीमा और स्वास्थ्य बीमा",
+        "",
+    ]
+    for words in _keywords(language).values():
+        for keyword in words:
+            messages += [keyword, keyword + "s", keyword + "es", keyword.upper(),
+                         f"question about {keyword} cover", f"x{keyword}y", f"({keyword})"]
+    return messages
+
+
+@pytest.mark.parametrize("language", list(CONFIG["insurance_keywords"]))
+def test_scores_match_the_regex_matcher(language):
+    keywords = _keywords(language)
+    matcher, reference = KeywordMatcher(keywords), RegexKeywordMatcher(keywords)
+    for message in _messages(language):
+        assert matcher.scores(message) == pytest.approx(reference.scores(message)), message
+
+def test_multi_word_keyword_wins_over_its_first_word():
+    matcher = KeywordMatcher({"liability": ["responsabilité civile"], "health": ["responsabilité"]})
+    assert matcher.rank("Une assurance responsabilité civile") == [("liability", 1.0)]
+    assert matcher.rank("Une responsabilité partagée") == [("health", 1.0)]
+
+def test_shared_keyword_splits_its_weight_and_ties_follow_configuration_order():
+    matcher = KeywordMatcher({"business": ["liability"], "liability": ["liability", "sued"]})
+    assert matcher.rank("liability") == [("business", 0.5), ("liability", 0.5)]
+    assert matcher.rank("sued over liability") == [("liability", 0.75), ("business", 0.25)]
+
+def test_language_matcher_includes_english_keywords():
+    assert _build_matcher("French").rank("car and voiture")[0][0] == "auto"
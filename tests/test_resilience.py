@@ -0,0 +1,127 @@
+import itertools
+import pytest
+from config import CONFIG
+from backends import BackendError, InferenceBackend
+from model import InferenceError, InsuranceLLM, ServiceUnavailableError
+from resilience import CircuitBreaker, get_circuit_breaker
+from response_cache import MemoryResponseCache
+
+_endpoints = itertools.count()
+
+
+class ScriptedBackend(InferenceBackend):
+    """Backend that raises or returns the next scripted outcome on each call."""
+
+    def __init__(self, *outcomes):
+        self.name = f"scripted-{next(_endpoints)}"
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def generate(self, prompt, parameters, timeout):
+        return self._next()
+
+    def stream(self, prompt, parameters, timeout):
+        yield self._next()
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+def _expire(breaker):
+    """Pretend reset_timeout has passed since the circuit opened."""
+    breaker.opened_at -= breaker.reset_timeout + 1
+
+def _llm(backend, monkeypatch):
+    for key, value in {"failover_backend": None, "batching_enabled": False, "max_retries": 1}.items():
+        monkeypatch.setitem(CONFIG, key, value)
+    return InsuranceLLM(cache=MemoryResponseCache(10, 60), backend=backend)
+
+
+def test_breaker_opens_after_consecutive_failures_and_rejects():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+    breaker.allow_request()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.failures == 0 and breaker.state == CircuitBreaker.CLOSED
+    _open(breaker)
+    assert not breaker.allow_request()
+
+def test_half_open_lets_one_trial_through_and_success_closes():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    _open(breaker)
+    _expire(breaker)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()  # Only one trial at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+    assert breaker.transitions == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    _open(breaker)
+    _expire(breaker)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+def test_released_trial_lets_the_next_request_be_the_trial():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    _open(breaker)
+    _expire(breaker)
+    assert breaker.allow_request()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+@pytest.mark.parametrize("trial_error", [
+    BackendError("bad request", status_code=400, retryable=False),
+    RuntimeError("unexpected failure in a local model")
+])
+def test_trial_ending_in_a_non_retryable_error_does_not_block_the_breaker(trial_error, monkeypatch):
+    backend = ScriptedBackend(trial_error, "recovered text")
+    llm = _llm(backend, monkeypatch)
+    breaker = get_circuit_breaker(backend.endpoint)
+    _open(breaker)
+    _expire(breaker)
+
+    with pytest.raises((InferenceError, RuntimeError)):
+        llm._request_from_backend(backend, "prompt")
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # The next request is allowed as the new trial and closes the circuit
+    assert llm._request_from_backend(backend, "prompt") == "recovered text"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_streaming_trial_ending_in_a_non_retryable_error_does_not_block_the_breaker(monkeypatch):
+    backend = ScriptedBackend(BackendError("bad request", status_code=400, retryable=False), "recovered")
+    llm = _llm(backend, monkeypatch)
+    breaker = get_circuit_breaker(backend.endpoint)
+    _open(breaker)
+    _expire(breaker)
+
+    with pytest.raises(InferenceError):
+        list(llm._stream_from_backend(backend, "prompt"))
+    assert list(llm._stream_from_backend(backend, "prompt")) == ["recovered"]
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_open_circuit_fails_fast_without_calling_the_backend(monkeypatch):
+    backend = ScriptedBackend("never returned")
+    llm = _llm(backend, monkeypatch)
+    _open(get_circuit_breaker(backend.endpoint))
+    with pytest.raises(ServiceUnavailableError):
+        llm._request_from_backend(backend, "prompt")
+    assert backend.calls == 0
@@ -0,0 +1,56 @@
+import pytest
+import response_cache
+from response_cache import MemoryResponseCache, SQLiteResponseCache, make_cache_key
+
+
+class Clock:
+    """Stands in for the time module, so expiry and recency don't depend on the real clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return clock
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryResponseCache
+    return lambda max_entries, ttl: SQLiteResponseCache(str(tmp_path / "responses.db"), max_entries, ttl)
+
+
+def test_key_ignores_whitespace_and_case_but_not_parameters():
+    key = make_cache_key("model", "What is  a Deductible?", {"temperature": 0.7})
+    assert key == make_cache_key("model", "what is a deductible?", {"temperature": 0.7})
+    assert key != make_cache_key("model", "what is a deductible?", {"temperature": 0.2})
+
+def test_entries_expire_after_the_ttl(clock, make_cache):
+    cache = make_cache(10, 60)
+    cache.set("key", "value")
+    clock.now += 59
+    assert cache.get("key") == "value"
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_least_recently_used_entry_is_evicted(clock, make_cache):
+    cache = make_cache(2, 60)
+    cache.set("a", "1")
+    clock.now += 1
+    cache.set("b", "2")
+    clock.now += 1
+    assert cache.get("a") == "1"
+    clock.now += 1
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert len(cache) == 2 and cache.evictions == 1
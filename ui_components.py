@@ -1,11 +1,14 @@
+import html
+import re
 import streamlit as st
 from config import CONFIG
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Characters escaped so user messages are not interpreted as markdown
+MARKDOWN_SPECIAL = re.compile(r"([\\`*_\[\]#<>|~$])")
+
 class InsuranceChatbotUI:
     """Class to handle UI components for the insurance chatbot."""
     
@@ -49,6 +52,13 @@ class InsuranceChatbotUI:
         
         return country, language
     
+    def display_rerun_timings(self, timings):
+        """Show the last and median rerun wall time in the sidebar, if enabled."""
+        if not CONFIG["show_rerun_timings"] or not timings:
+            return
+        median = sorted(timings)[len(timings) // 2]
+        st.sidebar.caption(f"Last rerun: {timings[-1]:.0f} ms · median of last {len(timings)}: {median:.0f} ms")
+    
     def display_insurance_type_buttons(self):
         """Display buttons for selecting insurance types."""
         st.markdown("### Select Insurance Type (optional)")
@@ -68,33 +78,119 @@ class InsuranceChatbotUI:
         return selected_type
     
     def display_chat_history(self, chat_history):
-        """Display the chat history."""
+        """
+        Display the most recent page(s) of the chat history.
+        Older messages stay hidden behind a "Show earlier messages" button.
+        """
         st.markdown("### Chat")
         
+        page_size = CONFIG["chat_page_size"]
+        pages = st.session_state.setdefault("chat_pages", 1)
+        hidden = max(0, len(chat_history) - pages * page_size)
+        if hidden and st.button(f"Show earlier messages ({hidden} hidden)", key="chat_show_earlier"):
+            st.session_state.chat_pages = pages + 1
+            st.rerun()
+        
         # Create a container for chat messages
         chat_container = st.container()
         
         with chat_container:
-            for message in chat_history:
-                # User message with custom styling
-                st.markdown(
-                    f"""
+            for message in chat_history[hidden:]:
+                self.display_message(message)
+        
+        self._prune_fragments(chat_history[hidden:])
+    
+    def reset_chat_view(self):
+        """Forget paging and rendered fragments, e.g. after the chat is cleared."""
+        st.session_state.chat_pages = 1
+        st.session_state.chat_fragments = {}
+    
+    def display_message(self, message):
+        """Display one exchange; the assistant part is skipped while its response is still pending."""
+        if CONFIG["chat_render_mode"] == "html":
+            st.markdown(self._fragment(message, "user"), unsafe_allow_html=True)
+            if message['assistant']:
+                st.markdown(self._fragment(message, "assistant"), unsafe_allow_html=True)
+            return
+        
+        with st.chat_message("user"):
+            st.markdown(self._fragment(message, "user"))
+        if message['assistant']:
+            with st.chat_message("assistant"):
+                st.markdown(self._fragment(message, "assistant"))
+    
+    def _fragment(self, message, role):
+        """
+        Return the rendered text of one side of a message, cached in the session by message id.
+        The source text is stored with the fragment, so an edited message is rendered again.
+        """
+        fragments = st.session_state.setdefault("chat_fragments", {})
+        key = (message.get("id", id(message)), role)
+        text = message[role]
+        cached = fragments.get(key)
+        if cached is None or cached[0] != text:
+            cached = fragments[key] = (text, self._render_fragment(text, role))
+        return cached[1]
+    
+    def _render_fragment(self, text, role):
+        """Render message text for the configured chat render mode."""
+        if CONFIG["chat_render_mode"] == "html":
+            if role == "user":
+                return self._user_message_html(html.escape(text))
+            return self._assistant_message_html(text)
+        if role == "user":
+            # User text is shown as typed, not interpreted as markdown
+            return MARKDOWN_SPECIAL.sub(r"\\\1", text).replace("\n", "  \n")
+        # Keep the model's line breaks, which markdown would otherwise merge
+        return text.replace("\n", "  \n")
+    
+    def _prune_fragments(self, visible_messages):
+        """Drop cached fragments of messages that are no longer shown."""
+        fragments = st.session_state.get("chat_fragments", {})
+        if len(fragments) <= 2 * len(visible_messages) + CONFIG["chat_page_size"]:
+            return
+        visible = {message.get("id", id(message)) for message in visible_messages}
+        st.session_state.chat_fragments = {key: value for key, value in fragments.items() if key[0] in visible}
+    
+    def _user_message_html(self, text):
+        """Return the styled HTML block for a user message."""
+        return f"""
                     <div style='background-color: #e6f7ff; padding: 10px; border-radius: 10px; margin-bottom: 10px;'>
-                        <p><strong>You:</strong> {message['user']}</p>
+                        <p><strong>You:</strong> {text}</p>
                     </div>
-                    """, 
-                    unsafe_allow_html=True
-                )
-                
-                # Assistant message with custom styling
-                st.markdown(
-                    f"""
+                    """
+    
+    def _assistant_message_html(self, text):
+        """Return the styled HTML block for an assistant message."""
+        text = text.replace('\n', '<br>')
+        return f"""
                     <div style='background-color: #f0f0f0; padding: 10px; border-radius: 10px; margin-bottom: 20px;'>
-                        <p><strong>Assistant:</strong> {message['assistant'].replace('\n', '<br>')}</p>
+                        <p><strong>Assistant:</strong> {text}</p>
                     </div>
-                    """, 
-                    unsafe_allow_html=True
-                )
+                    """
+    
+    def display_streaming_response(self, chunks):
+        """Render an assistant response incrementally as chunks arrive and return the full text."""
+        if CONFIG["chat_render_mode"] == "html":
+            placeholder = st.empty()
+            def render(text):
+                placeholder.markdown(self._assistant_message_html(text), unsafe_allow_html=True)
+            thinking = "<em>Thinking...</em>"
+        else:
+            placeholder = st.chat_message("assistant").empty()
+            def render(text):
+                placeholder.markdown(text.replace("\n", "  \n"))
+            thinking = "*Thinking...*"
+        render(thinking)
+        response = ""
+        
+        for chunk in chunks:
+            response += chunk
+            # Show a cursor while the response is still being generated
+            render(response + "▌")
+        
+        render(response)
+        return response
     
     def display_input_area(self):
         """Display the text input area for user messages."""